@@ -17,9 +17,40 @@ def solve_docloud(scenario):
 def solve_cbc(scenario):
 	return solvers.mip.solve(scenario,kind='CBC',msg=msg)
 
+def solve_cbc_matrix(scenario):
+	return solvers.mip.solve(scenario,kind='CBC',backend='matrix',msg=msg)
+
+def solve_cbc_step(scenario):
+	return solvers.mip.solve(scenario,kind='CBC',formulation='step',msg=msg)
+
+def solve_cbc_lazy(scenario):
+	return solvers.mip.solve(scenario,kind='CBC',lazy_capacity=True,msg=msg)
+
+def solve_cbc_coarsen(scenario):
+	return solvers.mip.solve(scenario,kind='CBC',coarsen=2,msg=msg)
+
+def solve_cbc_compiled(scenario):
+	return solvers.mip.compile_model(scenario,msg=msg).resolve(kind='CBC',msg=msg)
+
+def solve_highs(scenario):
+	return solvers.mip.solve(scenario,kind='HIGHS',msg=msg)
+
 def solve_cbc_bigm(scenario):
 	return solvers.mip_bigm.solve(scenario,kind='CBC',msg=msg)
 
+def solve_cpsat(scenario):
+	return solvers.cpsat.solve(scenario,msg=msg)
+
+def solve_portfolio(scenario):
+	return solvers.portfolio.solve(scenario,methods=[solve_cbc,solve_cbc_step],msg=msg)
+
+def solve_portfolio_default(scenario):
+	return solvers.portfolio.solve(scenario,msg=msg)
+
+def solve_portfolio_bigm(scenario):
+	# mip_bigm must not win on scenarios it cannot model, e.g. PERIODS
+	return solvers.portfolio.solve(scenario,methods=['mip_bigm',solve_cbc],msg=msg)
+
 def solve_scip(scenario):
 	return solvers.mip.solve(scenario,kind='SCIP',msg=msg)
 
@@ -32,7 +63,17 @@ def solve_gurobi(scenario):
 
 solve_methods = [
 solve_cbc,
+solve_cbc_matrix,
+solve_cbc_step,
+solve_cbc_lazy,
+solve_cbc_coarsen,
+solve_cbc_compiled,
+solve_highs,
 solve_cbc_bigm,
+solve_cpsat,
+solve_portfolio,
+solve_portfolio_default,
+solve_portfolio_bigm,
 #solve_gurobi,
 #solve_scip,
 #solve_scip_bigm,
@@ -201,6 +242,14 @@ def CAPMAX():
 	sols = ['[(T1, R1, 0, 1), (T2, R2, 1, 2)]']
 	return S,sols
 
+def CAPMAXALT():
+	S = two_task_scenario()
+	S['T1'] += S['R1']|S['R2']
+	S['T2'] += S['R1']|S['R2']
+	S += S['R1']['length'].max + S['R2']['length'].max <= 1
+	sols = ['[(T1, R1, 0, 1), (T2, R1, 1, 2)]','[(T1, R2, 0, 1), (T2, R2, 1, 2)]']
+	return S,sols
+
 def SCHEDULECOST():
 	S = two_task_scenario()
 	S['T1'] += S['R1']
@@ -252,6 +301,7 @@ CAPSLICE,
 CAPDIFF,
 CAPDIFFSLICE,
 CAPMAX,
+CAPMAXALT,
 SCHEDULECOST,
 PERIODS
 ]
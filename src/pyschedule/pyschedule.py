@@ -278,6 +278,7 @@ class Scenario(_SchedElement):
 		self._tasks = _DICT_TYPE() #tasks
 		self._resources = _DICT_TYPE() #resources
 		self._constraints = list()
+		self.solve_stats = None # statistics of the last solve, filled by the solver
 
 	def Task(self,name,length=1,periods=None,group=None,schedule_cost=None,delay_cost=None,**kwargs) :
 		"""
@@ -1184,12 +1185,39 @@ class _Slice(_SchedElement):
 			end = t+T.length
 		else:
 			end = self._end
-		overlap = len(set(range(start,end)) & set(range(t,t+T.length)))
-		if not overlap:
+		overlap = min(end,t+T.length) - max(start,t)
+		if overlap <= 0:
 			return 0
 		w *= float(overlap)/float(T.length)
 		return w
 
+	def overlaps(self,length,horizon):
+		"""
+		returns pairs (t,fraction) for all starts t in range(horizon) of a task with the given
+		length which overlap with this slice, where fraction is the overlap divided by the length.
+		Hence, weight(T,t) is T[param]*fraction for these starts and zero otherwise
+		"""
+		if length <= 0:
+			return []
+		if self._start is None:
+			first = 0
+		else:
+			first = max(self._start-length+1,0)
+		if self._end is None:
+			last = horizon
+		else:
+			last = min(self._end,horizon)
+		overlaps = list()
+		for t in range(first,last):
+			overlap = length
+			if self._start is not None and self._start > t:
+				overlap -= self._start-t
+			if self._end is not None and self._end < t+length:
+				overlap -= t+length-self._end
+			if overlap > 0:
+				overlaps.append((t,float(overlap)/float(length)))
+		return overlaps
+
 	@property
 	def max(self):
 		self.kind = 'max'
@@ -30,6 +30,9 @@ should be directly written to the passed scenario
 
 from . import mip
 from . import mip_bigm
+from . import cpsat
 from . import cpoptimizer
 from . import ortools
 from . import listsched
+from . import portfolio
+from . import stats
@@ -89,6 +89,7 @@ tuple CapacityUpTask {
 {CapacityUp} CapacityUps = ...;
 {CapacityUp} CapacitySliceUps = ...;
 {CapacityUpTask} CapacityUpTasks = ...;
+float TimeLimit = ...; // in seconds, no time limit if not positive
 
 
 
@@ -100,6 +101,10 @@ cumulFunction ResourceFunction[TCR in TaskCumulResources] = pulse(Intervals[<TCR
 
 execute {
 	cp.param.FailLimit = 1000000;
+	if ( TimeLimit > 0 )
+	{
+		cp.param.TimeLimit = TimeLimit;
+	}
 }
 
 minimize sum(T in Tasks ) sum( O in Objectives : O.task_id == T.id ) endOf(Intervals[T]) * O.coefficient;
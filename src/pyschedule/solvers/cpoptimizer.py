@@ -1,5 +1,6 @@
 #! /usr/bin/env python
 from __future__ import absolute_import
+from __future__ import print_function
 '''
 Copyright 2015 Tim Nonner
 
@@ -21,7 +22,9 @@ specific language governing permissions and limitations
 under the License.
 '''
 
-import time, os, uuid
+import time, os, uuid, signal, subprocess, threading
+
+from . import stats
 
 
 def _get_tmp_dir() :
@@ -45,7 +48,7 @@ def _get_tmp_dir() :
 
 
 
-def _get_dat_filename(scenario,msg=0) :
+def _get_dat_filename(scenario,time_limit=None,msg=0) :
 
 	S = scenario
 	tmp_dir = _get_tmp_dir()
@@ -152,22 +155,35 @@ def _get_dat_filename(scenario,msg=0) :
 	CapacitySliceUps = list()
 	CapacitySliceUpTasks = list()
 	count = 0
-	for C in S.capacity_up() :
-		if C._start is None and C._end is None:
-			CapacityUps.append((count,resource_to_id[C.resource],C.bound,-1,-1))
-			for T in S.tasks() :
-				if C.weight(T):
-					CapacityUpTasks.append((count,task_to_id[T],C.weight(T)))
-			'''
-			else:
-			start = C._start
-			if start is None:
-				start = 0
-			end = C._end
-			if end is None:
-				end = S.horizon
-			CapacitySliceUps.append((count,resource_to_id[C.resource],C.bound,start,end))
-			'''
+	for C in S.capacity() :
+		# only sums over a single resource without slices, the model only uses integers
+		slices = list(C.slices())
+		if len(slices) != 1:
+			raise Exception('ERROR: cpoptimizer does not support capacity constraints over several resources')
+		SL = slices[0]
+		if SL._start is not None or SL._end is not None:
+			raise Exception('ERROR: cpoptimizer does not support capacity constraints with slices')
+		if SL.kind != 'sum':
+			raise Exception('ERROR: cpoptimizer does not support capacity constraints of kind %s'%SL.kind)
+		if C.bound != int(C.bound):
+			raise Exception('ERROR: cpoptimizer does not support the fractional capacity bound %s'%str(C.bound))
+		CapacityUps.append((count,resource_to_id[SL.resource],int(C.bound),-1,-1))
+		for T in S.tasks(resource=SL.resource) :
+			weight = C.SLA[SL]*SL.weight(T)
+			if weight != int(weight):
+				raise Exception('ERROR: cpoptimizer does not support the fractional capacity weight %s of task %s'%(str(weight),T.name))
+			if weight:
+				CapacityUpTasks.append((count,task_to_id[T],int(weight)))
+		'''
+		else:
+		start = C._start
+		if start is None:
+			start = 0
+		end = C._end
+		if end is None:
+			end = S.horizon
+		CapacitySliceUps.append((count,resource_to_id[C.resource],C.bound,start,end))
+		'''
 		count += 1
 
 	# objective
@@ -199,56 +215,106 @@ def _get_dat_filename(scenario,msg=0) :
 		f.write('CapacityUps={\n'+to_str(CapacityUps)+'\n};\n\n')
 		f.write('CapacitySliceUps={\n'+to_str(CapacitySliceUps)+'\n};\n\n')
 		f.write('CapacityUpTasks={\n'+to_str(CapacityUpTasks)+'\n};\n\n')
+		f.write('TimeLimit=%s;\n' % str(time_limit if time_limit is not None else 0))
 		f.close()
 
 	return dat_filename, task_to_id, id_to_resource
 
 
 
+def _parse_solution(log) :
+	"""
+	returns the rows (task_id,resource_id,start) of the solution block in the log,
+	which are separated by ";", or None if there is no solution block
+	"""
+	start_str, end_str = '##START_SOLUTION##', '##END_SOLUTION##'
+	start_i = log.find(start_str)
+	if start_i < 0:
+		return None
+	start_i += len(start_str)
+	end_i = log.find(end_str,start_i)
+	if end_i < 0:
+		return None
+	rows = list()
+	for row in log[start_i:end_i].split(';') :
+		row = row.strip()
+		if not row:
+			continue
+		task_id, resource_id, start = row.split(',')
+		rows.append((int(task_id),int(resource_id),int(start)))
+	return rows
+
+
+
 def _read_solution(scenario,log,task_to_id,id_to_resource,msg=0) :
 	S = scenario
 
-	# parse output 
-	from pyparsing import Keyword,Literal,Word,alphas,nums,printables,OneOrMore,ZeroOrMore,dblQuotedString,Group
-	INT = Word( nums )
-	int_row = Group( INT + Literal(",").suppress() + \
-                         INT + Literal(",").suppress() + \
-			 INT + Literal(";").suppress() )
-	plan = Group( Group( ZeroOrMore(int_row) ) )
-
-	try:
-		start_str, end_str = '##START_SOLUTION##', '##END_SOLUTION##'
-		start_i, end_i = log.index(start_str)+len(start_str), log.index(end_str)
-	except:
-		print(log)
+	rows = _parse_solution(log)
+	if rows is None:
 		if msg:
+			print(log)
 			print('ERROR: no solution found')
 		return 0
 
-	opl_plan = plan.parseString(log[start_i:end_i])
-	int_plan = opl_plan[0][0]
-
 	# get starts and resource assignments
 	starts = dict()
 	assign = dict()
-	for row in int_plan :
-		task_id = int(row[0])
-		starts[task_id] = int(row[2])
+	for task_id, resource_id, start in rows :
+		starts[task_id] = start
 		if task_id not in assign :
 			assign[task_id] = list()
-		assign[task_id].append(int(row[1]))
+		assign[task_id].append(resource_id)
 
 	# add to scenario
 	for T in S.tasks() :
-		T.start_value = starts[task_to_id[T]]
-		if T.resources is None :
-			T.resources = list()
-		T.resources = [ id_to_resource[j] for j in assign[task_to_id[T]] ]
+		T.start_value = starts.get(task_to_id[T])
+		T.resources = [ id_to_resource[j] for j in assign.get(task_to_id[T],[]) ]
 
 	return 1
 
 
 
+def _run_oplrun(mod_filename,dat_filename,timeout=None,msg=0) :
+	"""
+	runs oplrun and returns its output, the process is killed after timeout seconds
+	"""
+	# own process group such that child processes of oplrun are killed as well
+	preexec_fn = None
+	if hasattr(os, 'setpgrp'):
+		preexec_fn = os.setpgrp
+	proc = subprocess.Popen(['oplrun',mod_filename,dat_filename], stdout=subprocess.PIPE,
+							stderr=subprocess.STDOUT, universal_newlines=True, preexec_fn=preexec_fn)
+	killed = list()
+	def kill():
+		killed.append(True)
+		if hasattr(os, 'killpg'):
+			os.killpg(proc.pid, signal.SIGKILL)
+		else:
+			proc.kill()
+	timer = None
+	if timeout is not None:
+		timer = threading.Timer(timeout,kill)
+		timer.start()
+	log = list()
+	try:
+		for line in proc.stdout:
+			if msg:
+				print(line, end='')
+			log.append(line)
+		proc.stdout.close()
+		proc.wait()
+	finally:
+		if timer is not None:
+			timer.cancel()
+		if proc.poll() is None:
+			kill()
+			proc.wait()
+	if killed and msg:
+		print('INFO: oplrun was stopped after %.2f seconds' % timeout)
+	return ''.join(log)
+
+
+
 def _get_mod_filename(mod_filename=None) :
 	if mod_filename is None :
 		solvers_path = os.path.dirname(os.path.realpath(__file__))
@@ -257,20 +323,42 @@ def _get_mod_filename(mod_filename=None) :
 
 
 
-def solve(scenario,mod_filename=None,msg=0) :
-	""" solve using cpoptimzer, make sure that the executable oplrun is in your PATH """
+def solve(scenario,mod_filename=None,time_limit=None,grace_time=5,msg=0) :
+	"""
+	solve using cpoptimzer, make sure that the executable oplrun is in your PATH
+
+	Args:
+		scenario:     scenario to solve
+		mod_filename: model file, default is cpoptimizer.mod in this directory
+		time_limit:   a time limit in seconds which is passed to cpoptimizer
+		grace_time:   additional time in seconds after the time limit until oplrun is stopped
+		msg:          0 means no feedback (default) during computation, 1 means feedback
+	"""
 	S = scenario
+	build_start_time = time.time()
 	mod_filename = _get_mod_filename(mod_filename)
-	dat_filename, task_to_id, id_to_resource = _get_dat_filename(scenario,msg=msg)
+	dat_filename, task_to_id, id_to_resource = _get_dat_filename(scenario,time_limit=time_limit,msg=msg)
+	build_time = time.time()-build_start_time
 
 	# run cp-optimizer
 	start_time = time.time()
-	log = os.popen('oplrun %s %s' % (mod_filename, dat_filename) ).read()
+	timeout = None
+	if time_limit is not None:
+		timeout = time_limit + grace_time
+	try:
+		log = _run_oplrun(mod_filename,dat_filename,timeout=timeout,msg=msg)
+	finally:
+		os.remove(dat_filename)
+	solve_time = time.time()-start_time
 	if msg :
-		print('INFO: execution time (sec) = '+str(time.time()-start_time))
+		print('INFO: execution time (sec) = '+str(solve_time))
 
 	# read solution
-	return _read_solution(S,log,task_to_id,id_to_resource,msg=msg)
+	success = _read_solution(S,log,task_to_id,id_to_resource,msg=msg)
+	S.solve_stats = stats.SolveStats(solver='cpoptimizer',
+		status=stats.FEASIBLE if success else stats.NOT_SOLVED,
+		build_time=build_time,solve_time=solve_time)
+	return success
 
 
 
@@ -279,15 +367,26 @@ def solve_docloud(scenario,api_key,
                   mod_filename=None,msg=0) :
 	""" solve using DOCloud, api_key is required """
 	S = scenario
+	build_start_time = time.time()
 	mod_filename = _get_mod_filename(mod_filename)
 	dat_filename, task_to_id, id_to_resource = _get_dat_filename(scenario,msg=msg)
+	build_time = time.time()-build_start_time
 
 	# solve and read solution
 	from . import docloud
-	log = docloud.solve(base_url=base_url,api_key=api_key,filenames=[mod_filename,dat_filename],msg=msg)
+	start_time = time.time()
+	try:
+		log = docloud.solve(base_url=base_url,api_key=api_key,filenames=[mod_filename,dat_filename],msg=msg)
+	finally:
+		os.remove(dat_filename)
+	solve_time = time.time()-start_time
 	if msg :
 		print(log)
-	return _read_solution(S,log,task_to_id,id_to_resource,msg=msg)
+	success = _read_solution(S,log,task_to_id,id_to_resource,msg=msg)
+	S.solve_stats = stats.SolveStats(solver='docloud',
+		status=stats.FEASIBLE if success else stats.NOT_SOLVED,
+		build_time=build_time,solve_time=solve_time)
+	return success
 
 
 
@@ -0,0 +1,351 @@
+#! /usr/bin/env python
+from __future__ import absolute_import as _absolute_import
+from __future__ import print_function
+
+'''
+Copyright 2015 Tim Nonner
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+'''
+
+import time, math, collections
+
+from . import stats
+
+
+def _scale(values):
+	"""
+	returns the smallest power of ten such that all values become integer after
+	multiplying them with it, cp-sat only accepts integer coefficients
+	"""
+	for scale in [ 10**k for k in range(7) ]:
+		if all( abs(v*scale-round(v*scale)) < 1e-9 for v in values ):
+			return scale
+	raise Exception('ERROR: coefficients %s cannot be scaled to integers' % str(values))
+
+
+def solve(scenario, time_limit=None, num_workers=None, random_seed=None, ratio_gap=0.0, on_solution=None, msg=0):
+	"""
+	Integration of the cp-sat solver of ortools. Each task is an interval
+	variable, which is optional if the task has a schedule_cost, and each resource
+	alternative is an optional interval. Unary resources are NoOverlap constraints,
+	all other resources are Cumulative constraints. Tasks of length zero do not
+	block any resource. Capacity constraints with diff slices are not supported
+
+	Args:
+		scenario:    scenario to solve
+		time_limit:  a time limit in seconds
+		num_workers: number of parallel search workers, default uses all cores
+		random_seed: random_seed
+		ratio_gap:   relative gap between the objective and the best bound at which
+		             the search stops
+		on_solution: function on_solution(scenario,objective,elapsed) which is called for
+		             every improving solution during the search, the start_value and
+		             resources of the tasks are set to this solution
+		msg:         0 means no feedback (default) during computation, 1 means feedback
+
+	Returns:
+		1 if solving was successful
+		0 if solving was not successful
+	"""
+
+	try:
+		from ortools.sat.python import cp_model
+	except ImportError:
+		raise Exception('ERROR: ortools is not installed')
+
+	S = scenario
+	S.check()
+	if S.horizon is None:
+		raise Exception('ERROR: cpsat requires a horizon')
+	build_start_time = time.time()
+	model = cp_model.CpModel()
+
+	# resource variables, a task uses the same resource in all resource requirements
+	# where it occurs, and the last coefficient counts as in the discrete mip
+	coeffs = collections.OrderedDict()
+	for T in S.tasks():
+		for RA in T.resources_req:
+			for R in RA:
+				coeffs[T,R] = RA[R]
+	single_resources = { T : { R for RA in T.resources_req if len(RA) == 1 for R in RA } for T in S.tasks() }
+
+	# start periods
+	starts = dict()
+	presence = dict()
+	for T in S.tasks():
+		periods = set(S.get_periods(T))
+		for R in single_resources[T]:
+			periods &= set(S.get_periods(R))
+		low, up = 0, S.horizon-1
+		for P in S.bounds_low():
+			if P.task is T:
+				low = max(low,P.bound)
+		for P in S.bounds_up():
+			if P.task is T:
+				up = min(up,P.bound-T.length)
+		for P in S.bounds_low_tight():
+			if P.task is T:
+				low, up = max(low,P.bound), min(up,P.bound)
+		for P in S.bounds_up_tight():
+			if P.task is T:
+				low, up = max(low,P.bound-T.length), min(up,P.bound-T.length)
+		periods = sorted( t for t in periods if low <= t <= up )
+		if T.schedule_cost is None:
+			if not periods:
+				if msg:
+					print('ERROR: task %s has no feasible start' % T.name)
+				return 0
+			presence[T] = model.NewConstant(1)
+		else:
+			presence[T] = model.NewBoolVar('%s_present' % T.name)
+			if not periods:
+				model.Add(presence[T] == 0)
+				periods = [0]
+		starts[T] = model.NewIntVarFromDomain(cp_model.Domain.FromValues(periods), '%s_start' % T.name)
+
+	# resource alternatives, single resources use the presence of the task
+	lits = dict()
+	for T,R in coeffs:
+		if R in single_resources[T]:
+			lits[T,R] = presence[T]
+		else:
+			lits[T,R] = model.NewBoolVar('%s_%s' % (T.name,R.name))
+			if R.periods is not None:
+				model.AddLinearExpressionInDomain(starts[T],
+					cp_model.Domain.FromValues(R.periods)).OnlyEnforceIf(lits[T,R])
+	for T in S.tasks():
+		for RA in T.resources_req:
+			if len(RA) > 1:
+				model.Add(sum( lits[T,R] for R in RA ) == presence[T])
+	# resource requirements which are shared by several tasks select the same resource
+	ra_to_tasks = S.resources_req_tasks()
+	for RA in ra_to_tasks:
+		tasks = list(ra_to_tasks[RA])
+		for T_ in tasks[1:]:
+			for R in RA:
+				model.Add(lits[tasks[0],R] == lits[T_,R])
+
+	# inherited resource usage
+	for T in S.tasks():
+		for TR in T.tasks_req:
+			if TR in S.tasks():
+				model.AddImplication(presence[TR],presence[T])
+				continue
+			for T_ in TR:
+				resources = TR.map_obj[T_]
+				if not isinstance(resources,list):
+					resources = [resources]
+				for R in resources:
+					if R not in S.resources() or (T_,R) not in lits:
+						continue
+					if (T,R) in lits:
+						model.AddImplication(lits[T_,R],lits[T,R])
+					else:
+						model.Add(lits[T_,R] == 0)
+
+	# intervals
+	intervals = dict()
+	for T,R in coeffs:
+		if T.length == 0:
+			continue
+		if lits[T,R] is presence[T] and T.schedule_cost is None:
+			intervals[T,R] = model.NewFixedSizeIntervalVar(starts[T],T.length,'%s_%s_interval' % (T.name,R.name))
+		else:
+			intervals[T,R] = model.NewOptionalFixedSizeIntervalVar(starts[T],T.length,lits[T,R],
+																  '%s_%s_interval' % (T.name,R.name))
+
+	# resources
+	for R in S.resources():
+		size = R.size if R.size is not None else 1
+		tasks = [ T for T in S.tasks(resource=R) if (T,R) in intervals and coeffs[T,R] ]
+		for T in tasks:
+			if coeffs[T,R] > size:
+				model.Add(lits[T,R] == 0)
+		tasks = [ T for T in tasks if coeffs[T,R] <= size ]
+		if not tasks:
+			continue
+		if size <= 1 and all( coeffs[T,R] == size for T in tasks ):
+			model.AddNoOverlap([ intervals[T,R] for T in tasks ])
+			continue
+		scale = _scale([size] + [ coeffs[T,R] for T in tasks ])
+		model.AddCumulative([ intervals[T,R] for T in tasks ],
+							[ int(round(coeffs[T,R]*scale)) for T in tasks ],
+							int(round(size*scale)))
+
+	# precedences, resource_left/right restrict them to the tasks on these resources
+	def lit(T,R):
+		if R is not None and (T,R) in lits:
+			return lits[T,R]
+		return presence[T]
+
+	for P in S.precs_lax():
+		left, right = P.task_left, P.task_right
+		dist = left.length+P.offset
+		if P.resource_right is not None:
+			on = lit(right,P.resource_right)
+			model.AddImplication(on,lit(left,P.resource_left))
+			model.Add(starts[left]+dist <= starts[right]).OnlyEnforceIf(on)
+		if P.resource_left is not None or P.resource_right is None:
+			on = lit(left,P.resource_left)
+			model.AddImplication(on,lit(right,P.resource_right))
+			model.Add(starts[left]+dist <= starts[right]).OnlyEnforceIf(on)
+
+	for P in S.precs_tight():
+		left, right = P.task_left, P.task_right
+		on = lit(left,P.resource_left)
+		model.AddImplication(on,lit(right,P.resource_right))
+		model.Add(starts[left]+left.length+P.offset == starts[right]).OnlyEnforceIf(on)
+
+	for P in S.precs_cond():
+		left, right = P.task_left, P.task_right
+		for R in set(S.resources(task=left)) & set(S.resources(task=right)):
+			model.Add(starts[left]+left.length+P.offset <= starts[right]) \
+				.OnlyEnforceIf([lits[left,R],lits[right,R]])
+
+	# overlap of a task with a slice if it is scheduled on the resource of the slice,
+	# the weight of the task is its parameter times the overlap divided by its length.
+	# Returns the overlap variable and its upper bound
+	overlaps = dict()
+	def overlap(SL,T):
+		R = SL.resource
+		if (id(SL),T) in overlaps:
+			return overlaps[id(SL),T]
+		if SL._start is None and SL._end is None:
+			overlaps[id(SL),T] = (lits[T,R],1)
+			return overlaps[id(SL),T]
+		# the overlap is min(end of task, end of slice) - max(start of task, start of slice)
+		start = 0 if SL._start is None else SL._start
+		end = S.horizon+T.length if SL._end is None else SL._end
+		first = model.NewIntVar(min(start,0),max(start,S.horizon),'')
+		last = model.NewIntVar(min(end,0),max(end,S.horizon+T.length),'')
+		model.AddMaxEquality(first,[starts[T],start])
+		model.AddMinEquality(last,[starts[T]+T.length,end])
+		length = model.NewIntVar(0,T.length,'')
+		model.AddMaxEquality(length,[last-first,0])
+		# only count the overlap if the task is scheduled on the resource
+		var = model.NewIntVar(0,T.length,'')
+		model.Add(var == length).OnlyEnforceIf(lits[T,R])
+		model.Add(var == 0).OnlyEnforceIf(lits[T,R].Not())
+		overlaps[id(SL),T] = (var,T.length)
+		return overlaps[id(SL),T]
+
+	def slice_terms(SL,C):
+		R = SL.resource
+		terms = list()
+		for T in S.tasks(resource=R):
+			if T.length == 0 or SL._param not in T or not T[SL._param]:
+				continue
+			var, length = overlap(SL,T)
+			terms.append((var,C.SLA[SL]*T[SL._param]/float(length),length))
+		return terms
+
+	for C in S.capacity():
+		if C.slices_diff():
+			raise Exception('ERROR: diff capacity constraints are not supported by cpsat')
+		terms = list()
+		for SL in C.slices_sum():
+			terms += slice_terms(SL,C)
+		terms_max = [ slice_terms(SL,C) for SL in C.slices_max() ]
+		scale = _scale([C.bound] + [ coeff for terms_ in [terms] + terms_max for var,coeff,up in terms_ ])
+		affine = [ var*int(round(coeff*scale)) for var,coeff,up in terms ]
+		# max slices only count the largest weight of a single task
+		for terms_ in terms_max:
+			if not terms_:
+				continue
+			cap = model.NewIntVar(0,max( max(int(round(coeff*scale))*up,0) for var,coeff,up in terms_ ),'')
+			for var,coeff,up in terms_:
+				model.Add(cap >= var*int(round(coeff*scale)))
+			affine.append(cap)
+		if affine:
+			model.Add(sum(affine) <= int(math.floor(C.bound*scale+1e-9)))
+
+	# objective
+	objective = list()
+	for T in S.tasks():
+		if T.delay_cost:
+			if T.schedule_cost is None:
+				objective.append(starts[T]*T.delay_cost)
+			else:
+				# the start of an unscheduled task is free and does not count
+				delay = model.NewIntVar(0,S.horizon-1,'%s_delay' % T.name)
+				model.Add(delay == starts[T]).OnlyEnforceIf(presence[T])
+				model.Add(delay == 0).OnlyEnforceIf(presence[T].Not())
+				objective.append(delay*T.delay_cost)
+		if T.schedule_cost:
+			objective.append(presence[T]*T.schedule_cost)
+	for T,R in coeffs:
+		if R.cost_per_period is not None and T.length:
+			objective.append(lits[T,R]*(R.cost_per_period*T.length))
+	if objective:
+		model.Minimize(sum(objective))
+
+	solver = cp_model.CpSolver()
+	if time_limit is not None:
+		solver.parameters.max_time_in_seconds = time_limit
+	if num_workers is not None:
+		solver.parameters.num_workers = num_workers
+	if random_seed is not None:
+		solver.parameters.random_seed = random_seed
+	if ratio_gap:
+		solver.parameters.relative_gap_limit = ratio_gap
+	solver.parameters.log_search_progress = bool(msg)
+
+	def read_solution(value):
+		for T in S.tasks():
+			if not value(presence[T]):
+				T.start_value = None
+				T.resources = list()
+				continue
+			T.start_value = value(starts[T])
+			T.resources = list()
+			for RA in T.resources_req:
+				for R in RA:
+					if R not in T.resources and value(lits[T,R]):
+						T.resources.append(R)
+
+	# cp-sat only reports improving solutions, also with several workers
+	class SolutionCallback(cp_model.CpSolverSolutionCallback):
+		def on_solution_callback(self):
+			read_solution(self.Value)
+			on_solution(S,self.ObjectiveValue() if objective else 0,time.time()-start_time)
+
+	proto = model.Proto()
+	build_time = time.time()-build_start_time
+	start_time = time.time()
+	if on_solution is not None:
+		status = solver.Solve(model,SolutionCallback())
+	else:
+		status = solver.Solve(model)
+	S.solve_stats = stats.SolveStats(solver='cpsat',
+		num_variables=len(proto.variables),
+		num_constraints=len(proto.constraints),
+		build_time=build_time,
+		solve_time=time.time()-start_time)
+	if status == cp_model.INFEASIBLE:
+		S.solve_stats.status = stats.INFEASIBLE
+	if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+		if msg:
+			print('ERROR: no solution found')
+		return 0
+	S.solve_stats.status = stats.OPTIMAL if status == cp_model.OPTIMAL else stats.FEASIBLE
+	S.solve_stats.objective = solver.ObjectiveValue() if objective else 0
+	S.solve_stats.set_bound(solver.BestObjectiveBound() if objective else 0)
+
+	read_solution(solver.Value)
+	return 1
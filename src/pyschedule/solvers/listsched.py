@@ -22,6 +22,9 @@ under the License.
 '''
 
 import copy
+import time
+
+from . import stats
 
 def sort_with_precs(scenario) :
 	"""
@@ -67,6 +70,7 @@ def solve(scenario,solve_method,task_list=None,batch_size=1,plot_method=None,msg
 	"""
 
 	S = scenario
+	start_time = time.time()
 
 	if task_list is None :
 		task_list = sort_with_precs(S)
@@ -96,6 +100,12 @@ def solve(scenario,solve_method,task_list=None,batch_size=1,plot_method=None,msg
 		for T in S.tasks():
 			S += T >= T.start_value
 
+	# list scheduling gives no bound, so the solution is at best feasible
+	S.solve_stats = stats.SolveStats(solver='listsched',objective=stats.objective_value(S),
+	                                 solve_time=time.time()-start_time)
+	if S.solve_stats.objective is not None:
+		S.solve_stats.status = stats.FEASIBLE
+
 
 		
 		
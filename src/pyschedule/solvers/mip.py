@@ -1,7 +1,6 @@
 #! /usr/bin/python
 from __future__ import absolute_import as _absolute_import
 from __future__ import print_function
-import copy
 
 '''
 Copyright 2015 Tim Nonner
@@ -25,7 +24,13 @@ under the License.
 '''
 
 from .mip_pulp import MIP
+from . import mip_matrix
+from . import stats
+from pyschedule.pyschedule import Task, Resource, _ResourceAffine
 import collections
+import copy
+import heapq
+import time
 
 def _get_groups(scenario,elements):
 	"""
@@ -55,16 +60,295 @@ def _get_resource_groups(scenario):
 	return _get_groups(scenario,elements)
 
 
-def solve(scenario, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, msg=0):
+def _get_resource_pools(scenario):
+	"""
+	computes groups of interchangeable resources which can be modelled as one
+	cumulative resource. These are resources of size one with the same group,
+	periods and no cost, which are only required in the same alternatives
+	R1|R2|..., and which are not referenced by constraints or task requirements.
+	Returns a list of lists of resources
+	"""
+	S = scenario
+	# resources referenced by constraints need to stay individual resources
+	fixed = set()
+	for P in S.precs_lax() + S.precs_tight() + S.precs_cond():
+		fixed.update([P.resource_left,P.resource_right])
+	for C in S.capacity():
+		fixed.update( SL.resource for SL in C.slices() )
+	for P in S.precs_cond():
+		fixed.update(S.resources(task=P.task_left))
+		fixed.update(S.resources(task=P.task_right))
+	ra_to_tasks = S.resources_req_tasks()
+	for T in S.tasks():
+		for TR in T.tasks_req:
+			fixed.update( R for R in TR.map_obj.values() if isinstance(R,Resource) )
+		for RA in T.resources_req:
+			# alternatives which are shared by several tasks require the same resource
+			if RA in ra_to_tasks and len(ra_to_tasks[RA]) > 1:
+				fixed.update(RA)
+			if any( RA[R] != 1 for R in RA ):
+				fixed.update(RA)
+
+	# alternatives in which each resource appears
+	alternatives = collections.defaultdict(set)
+	for T in S.tasks():
+		for RA in T.resources_req:
+			for R in RA:
+				alternatives[R].add(frozenset(RA))
+
+	pools = list()
+	pooled = set()
+	for T in S.tasks():
+		for RA in T.resources_req:
+			members = list(RA)
+			if len(members) < 2 or members[0] in pooled:
+				continue
+			def signature(R):
+				periods = tuple(R.periods) if R.periods is not None else None
+				return (R.size, R.group, periods, R.cost_per_period)
+			if any( R in fixed or alternatives[R] != {frozenset(RA)} for R in members ):
+				continue
+			if any( R.size not in [None,1] or R.cost_per_period is not None for R in members ):
+				continue
+			if len({ signature(R) for R in members }) > 1:
+				continue
+			pools.append(members)
+			pooled.update(members)
+	return pools
+
+
+def _pool_resources(scenario, pools):
+	"""
+	returns a copy of the scenario where each pool of resources is replaced by
+	one resource with the size of the pool
+	"""
+	S = copy.deepcopy(scenario)
+	for members in pools:
+		names = set( R.name for R in members )
+		R_ = members[0]
+		pool = Resource(name='|'.join( R.name for R in members ), size=len(members),
+						periods=copy.copy(R_.periods))
+		for T in S.tasks():
+			# as in the discrete mip, repeated alternatives are satisfied by a single resource
+			resources_req = [ RA for RA in T.resources_req if set( R.name for R in RA ) != names ]
+			if len(resources_req) < len(T.resources_req):
+				resources_req.append(_ResourceAffine(pool))
+				T.resources_req = resources_req
+			if T.resources:
+				resources = [ R for R in T.resources if R.name not in names ]
+				if len(resources) < len(T.resources):
+					resources.append(pool)
+				T.resources = resources
+		for R in members:
+			S.remove_resource(S[R.name])
+		S.add_resource(pool)
+	return S
+
+
+def _split_pools(scenario, scenario_pooled, pools):
+	"""
+	copies the solution of the pooled scenario back, and assigns the tasks
+	of each pool to individual resources such that they do not overlap
+	"""
+	S = scenario
+	pool_names = set()
+	for members in pools:
+		pool_names.add('|'.join( R.name for R in members ))
+	for T in S.tasks():
+		T_ = scenario_pooled[T.name]
+		T.start_value = T_.start_value
+		if T_.resources is None:
+			T.resources = None
+			continue
+		T.resources = [ S[R.name] for R in T_.resources if R.name not in pool_names ]
+
+	for members in pools:
+		names = set( R.name for R in members )
+		tasks = [ T for T in S.tasks() if T.start_value is not None
+				  and any( set( R.name for R in RA ) == names for RA in T.resources_req ) ]
+		tasks = sorted(tasks,key=lambda T:(T.start_value,-T.length))
+		# the end of the last task on each resource, the capacity constraint
+		# of the pool guarantees that enough resources are free at each start
+		free = collections.OrderedDict( (R,0) for R in members )
+		for T in tasks:
+			R = min(free,key=lambda R:(free[R] > T.start_value,free[R]))
+			free[R] = max(free[R],T.start_value+T.length)
+			T.resources.append(R)
+
+
+def _get_mip(scenario, backend=None, kind='CBC'):
+	# HiGHS is called in-process with the matrix of the model
+	if backend is None:
+		backend = 'matrix' if kind == 'HIGHS' else 'pulp'
+	if backend == 'pulp':
+		return MIP(str(scenario))
+	elif backend == 'matrix':
+		return mip_matrix.MIP(scenario.name)
+	raise Exception('ERROR: mip backend ' + str(backend) + ' not known')
+
+
+def _get_task_windows(scenario, task_groups=None):
+	"""
+	computes the earliest and latest start of each task from the horizon, the periods,
+	the bounds and the lax and tight precedence constraints without resource
+	specification. Returns a mapping of tasks to pairs (est, lst), if est > lst,
+	then the task cannot be scheduled
+	"""
+	S = scenario
+	if task_groups is None:
+		task_groups = _get_task_groups(S)
+	windows = dict()
+	for T in task_groups:
+		periods = S.get_periods(T)
+		if periods:
+			windows[T] = [max(min(periods),0), min(max(periods),S.horizon-1)]
+		else:
+			windows[T] = [S.horizon, -1]
+
+	def restrict(T,est=None,lst=None):
+		# windows are clipped to [0,horizon-1] such that the propagation terminates
+		changed = False
+		if est is not None and min(est,S.horizon) > windows[T][0]:
+			windows[T][0] = min(est,S.horizon)
+			changed = True
+		if lst is not None and max(lst,-1) < windows[T][1]:
+			windows[T][1] = max(lst,-1)
+			changed = True
+		return changed
+
+	for P in S.bounds_low():
+		if P.task in windows:
+			restrict(P.task,est=P.bound)
+	for P in S.bounds_up():
+		if P.task in windows:
+			restrict(P.task,lst=P.bound-P.task.length)
+	for P in S.bounds_low_tight():
+		if P.task in windows:
+			restrict(P.task,est=P.bound,lst=P.bound)
+	for P in S.bounds_up_tight():
+		if P.task in windows:
+			restrict(P.task,est=P.bound-P.task.length,lst=P.bound-P.task.length)
+
+	precs_lax = [ P for P in S.precs_lax()
+				  if P.resource_left is None and P.resource_right is None
+				  and P.task_left in windows and P.task_right in windows ]
+	precs_tight = [ P for P in S.precs_tight()
+					if P.resource_left is None and P.resource_right is None
+					and P.task_left in windows and P.task_right in windows ]
+	changed = True
+	while changed:
+		changed = False
+		for P in precs_lax:
+			left, right = P.task_left, P.task_right
+			dist = left.length+P.offset
+			# the last start of the left group needs a later start of the right group
+			changed |= restrict(left,lst=windows[right][1]-dist)
+			# if all tasks of the left group are scheduled, then all tasks of the right group follow
+			if left.schedule_cost is None:
+				changed |= restrict(right,est=windows[left][0]+dist)
+		for P in precs_tight:
+			left, right = P.task_left, P.task_right
+			dist = left.length+P.offset
+			# each start of the left group needs a start of the right group
+			changed |= restrict(left,est=windows[right][0]-dist,lst=windows[right][1]-dist)
+			if left.schedule_cost is None and len(task_groups[left]) == 1 and len(task_groups[right]) == 1:
+				changed |= restrict(right,est=windows[left][0]+dist,lst=windows[left][1]+dist)
+
+	return { T_ : tuple(windows[T]) for T in task_groups for T_ in task_groups[T] }
+
+
+def _coarsen_scenario(scenario, k):
+	"""
+	returns a copy of the scenario where all periods, lengths, bounds and offsets
+	are rounded into buckets of k periods
+	"""
+	def round_up(v):
+		return -(-v//k)
+	S = copy.deepcopy(scenario)
+	S.horizon = round_up(S.horizon)
+	for T in S.tasks():
+		T.length = round_up(T.length)
+		if T.start_value is not None:
+			T.start_value = T.start_value//k
+		if T.periods is not None:
+			T.periods = sorted({ t//k for t in T.periods })
+	for R in S.resources():
+		if R.periods is not None:
+			R.periods = sorted({ t//k for t in R.periods })
+	for P in S.precs_lax() + S.precs_tight() + S.precs_cond():
+		P.offset = P.offset//k
+	for P in S.bounds_low() + S.bounds_low_tight():
+		P.bound = P.bound//k
+	for P in S.bounds_up() + S.bounds_up_tight():
+		P.bound = round_up(P.bound)
+	slices = set()
+	for C in S.capacity():
+		# capacities on the length are measured in buckets
+		if all( SL._param == 'length' for SL in C.slices() ):
+			C.bound = round_up(C.bound)
+		for SL in C.slices():
+			if id(SL) in slices:
+				continue
+			slices.add(id(SL))
+			if SL._start is not None:
+				SL._start = SL._start//k
+			if SL._end is not None:
+				SL._end = round_up(SL._end)
+	return S
+
+
+def _refine_periods(scenario, scenario_coarse, k, window):
+	"""
+	returns the periods around the start of each task in the coarse scenario
+	"""
+	task_periods = dict()
+	for T in scenario.tasks():
+		t = scenario_coarse[T.name].start_value
+		if t is None:
+			task_periods[T] = set()
+			continue
+		task_periods[T] = set(range(max(t*k-window,0),min((t+1)*k+window,scenario.horizon)))
+	return task_periods
+
+
+def solve(scenario, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, backend=None,
+		formulation='pulse', coarsen=None, refine_window=None, fallback=True, warm_start=False, prune=True,
+		pool_resources=True, lazy_capacity=False, relax=False, threads=None, msg=0):
 	"""
 	Solves the given scenario using a discrete MIP
 
 	Args:
 		scenario:            scenario to solve
-		kind:                MIP-solver to use: CPLEX, GLPK, CBC, SCIP, GUROBI
-		time_limit:          a time limit, only for CPLEX, CBC and SCIP
+		kind:                MIP-solver to use: CPLEX, GLPK, CBC, SCIP, GUROBI, HIGHS (in-process
+		                     via scipy, requires the matrix backend)
+		time_limit:          a time limit, only for CPLEX, CBC, SCIP and HIGHS
 		random_seed:         random seed
 		ratio_gap:           MIP-gap
+		backend:             pulp (default) builds pulp objects, matrix assembles the model in
+		                     sparse arrays and passes it as a matrix to the solver (only CBC and
+		                     HIGHS), default is matrix for HIGHS and pulp otherwise
+		formulation:         pulse (default) uses the start variables in all constraints, step adds
+		                     variables for the number of starts before each period such that
+		                     precedence constraints have constant width
+		coarsen:             if k > 1, then first solve a coarsened scenario where k periods are
+		                     combined, and then refine the solution in the full resolution
+		refine_window:       number of periods around the coarse start which are considered during
+		                     the refinement, default is k
+		fallback:            solve the full model if the coarse model or the refinement are infeasible
+		warm_start:          use the current start_value and resources of the tasks as initial
+		                     solution, only for CBC, CPLEX and GUROBI
+		prune:               only create variables inside the earliest and latest start of each task,
+		                     which follow from the bounds and precedence constraints (default)
+		pool_resources:      model interchangeable resources as one cumulative resource and assign
+		                     the tasks to the individual resources after solving (default)
+		lazy_capacity:       start without the resource capacity rows, and only add the rows of
+		                     overloaded periods and solve again until the solution is feasible
+		relax:               solve the lp relaxation and round it to a schedule by list scheduling
+		                     in the order of the alpha-points of the tasks, this is fast but not
+		                     optimal, the lp bound is given in scenario.solve_stats. Capacity,
+		                     conditional precedence constraints and task requirements are not
+		                     supported
+		threads:             number of threads, only for CBC, SCIP, GUROBI and CPLEX
 		msg:                 0 means no feedback (default) during computation, 1 means feedback
 
 	Returns:
@@ -72,8 +356,122 @@ def solve(scenario, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0
 		0 if solving was not successful
 	"""
 	scenario.check()
-	mip = MIP(str(scenario))
-	return DiscreteMIP(mip).solve(scenario, kind=kind, time_limit=time_limit, random_seed=random_seed, ratio_gap=ratio_gap, msg=msg)
+	if pool_resources:
+		pools = _get_resource_pools(scenario)
+		if pools:
+			if msg:
+				print('INFO: pool resources '+', '.join( '|'.join( R.name for R in members ) for members in pools ))
+			scenario_pooled = _pool_resources(scenario, pools)
+			success = solve(scenario_pooled, kind=kind, time_limit=time_limit, random_seed=random_seed,
+							ratio_gap=ratio_gap, backend=backend, formulation=formulation, coarsen=coarsen,
+							refine_window=refine_window, fallback=fallback, warm_start=warm_start, prune=prune,
+							pool_resources=False, lazy_capacity=lazy_capacity, relax=relax, threads=threads,
+							msg=msg)
+			scenario.solve_stats = scenario_pooled.solve_stats
+			if not success:
+				return 0
+			_split_pools(scenario, scenario_pooled, pools)
+			return 1
+	params = dict(kind=kind, time_limit=time_limit, random_seed=random_seed, ratio_gap=ratio_gap,
+				  warm_start=warm_start, threads=threads, msg=msg)
+	if coarsen is not None and coarsen > 1:
+		if scenario.horizon is None:
+			raise Exception('ERROR: solver requires scenarios with defined horizon')
+		if refine_window is None:
+			refine_window = coarsen
+		scenario_coarse = _coarsen_scenario(scenario, coarsen)
+		mip = _get_mip(scenario_coarse, backend=backend, kind=kind)
+		if DiscreteMIP(mip,formulation=formulation,prune=prune,
+					   lazy_capacity=lazy_capacity,relax=relax).solve(scenario_coarse, **params):
+			task_periods = _refine_periods(scenario, scenario_coarse, coarsen, refine_window)
+			mip = _get_mip(scenario, backend=backend, kind=kind)
+			if DiscreteMIP(mip,formulation=formulation,task_periods=task_periods,prune=prune,
+						   lazy_capacity=lazy_capacity,relax=relax).solve(scenario, **params):
+				# the refined mip is restricted to windows, so there is no proof of optimality
+				scenario.solve_stats.status = stats.FEASIBLE
+				scenario.solve_stats.set_bound(None)
+				return 1
+		if not fallback:
+			return 0
+		if msg:
+			print('INFO: no solution found in coarsened scenario, solve full scenario')
+	mip = _get_mip(scenario, backend=backend, kind=kind)
+	return DiscreteMIP(mip,formulation=formulation,prune=prune,
+					   lazy_capacity=lazy_capacity,relax=relax).solve(scenario, **params)
+
+
+def compile_model(scenario, backend='pulp', formulation='pulse', prune=False, lazy_capacity=False, relax=False,
+				  msg=0):
+	"""
+	Builds the discrete MIP of the given scenario without solving it. The returned
+	DiscreteMIP can be changed and solved repeatedly without rebuilding the mip, e.g.
+
+	model = solvers.mip.compile_model(S)
+	model.set_delay_cost(T,2)
+	model.fix_task(T,5)
+	model.resolve()
+
+	Args:
+		scenario:            scenario to compile
+		backend:             pulp (default) or matrix, see solve
+		formulation:         pulse (default) or step, see solve
+		prune:               see solve, note that then set_bounds and release_task cannot extend
+		                     the bounds of the scenario
+		lazy_capacity:       see solve, rows which are added during resolve are kept
+		relax:               see solve
+		msg:                 0 means no feedback (default) during computation, 1 means feedback
+
+	Returns:
+		DiscreteMIP which provides set_bounds, fix_task, release_task, set_delay_cost,
+		set_schedule_cost and resolve
+	"""
+	scenario.check()
+	mip = _get_mip(scenario, backend=backend)
+	return DiscreteMIP(mip,formulation=formulation,prune=prune,
+					   lazy_capacity=lazy_capacity,relax=relax).compile(scenario, msg=msg)
+
+
+def write(scenario, filename, formulation='pulse', prune=True, msg=0):
+	"""
+	Writes the discrete MIP of the given scenario to a file without building pulp
+	objects, the solution of an external solver can be loaded with read
+
+	Args:
+		scenario:            scenario to write
+		filename:            name of the file, the format is lp if the name ends with .lp or .lp.gz
+		                     and mps otherwise, files ending with .gz are compressed
+		formulation:         pulse (default) or step, see solve
+		prune:               see solve
+		msg:                 0 means no feedback (default) during computation, 1 means feedback
+
+	Returns:
+		the compiled DiscreteMIP
+	"""
+	model = compile_model(scenario, backend='matrix', formulation=formulation, prune=prune, msg=msg)
+	model.write(filename)
+	return model
+
+
+def read(scenario, filename, formulation='pulse', prune=True, msg=0):
+	"""
+	Reads the solution file of a model written by write into the scenario. The model
+	is rebuilt from the scenario, so the scenario and the parameters need to be the
+	same as for write
+
+	Args:
+		scenario:            scenario to load the solution into
+		filename:            name of the solution file in the format of cbc, or with lines of the
+		                     form name value, files ending with .gz are decompressed
+		formulation:         see write
+		prune:               see write
+		msg:                 0 means no feedback (default) during computation, 1 means feedback
+
+	Returns:
+		1 if the file contains a solution
+		0 otherwise
+	"""
+	model = compile_model(scenario, backend='matrix', formulation=formulation, prune=prune, msg=msg)
+	return model.read(filename, msg=msg)
 
 
 class DiscreteMIP(object):
@@ -81,24 +479,60 @@ class DiscreteMIP(object):
 	pulp with time discretisation
 	"""
 
-	def __init__(self,mip):
+	def __init__(self,mip,formulation='pulse',task_periods=None,prune=False,lazy_capacity=False,relax=False):
+		if formulation not in ['pulse','step']:
+			raise Exception('ERROR: formulation ' + str(formulation) + ' not known')
 		self.mip = mip
+		self.formulation = formulation
+		self.task_periods = task_periods  # optional restriction of the periods of some tasks
+		self.prune = prune  # only create variables inside the start windows of the tasks
+		self.lazy_capacity = lazy_capacity  # only add capacity rows of overloaded periods
+		self.relax = relax  # solve the lp relaxation and round the solution
 		self.scenario = None
 		self.horizon = None
 		self.task_groups = None
 		self.resource_groups = None
 		self.x = None  # mip variables shortcut
+		self.var_keys = None  # keys of the mip variables in the order of creation
+		self.long_names = False  # name the variables by their keys instead of x0, x1, ...
+		self.x_cover = None  # resource -> period -> task starts covering the period
+		self.capacity_coeffs = None  # (task, resource) -> coefficient in the capacity rows
+		self.capacity_rows = None  # keys (R, t, zero) of the resource capacity rows which are added
+		self.task_cons = None  # task group -> row which requires the tasks to be scheduled
+		self.start_bounds = None  # task group -> current [low, up] range of start periods
+		self.start_bounds_scenario = None  # task group -> range of start periods given by the scenario
+
+	def _var(self, key, low=0, up=0, cat='Binary'):
+		# short names keep pulp fast, the i-th variable x<i> has the key self.var_keys[i]
+		if self.long_names:
+			name = str(key)
+		else:
+			name = 'x%i' % len(self.var_keys)
+		self.var_keys.append(key)
+		return self.mip.var(name, low, up, cat)
 
 	def build_mip_from_scenario(self, msg=0):
 		S = self.scenario
 		mip = self.mip
+		self.var_keys = list()
+		self.long_names = bool(msg)
 		self.task_groups = _get_task_groups(self.scenario)
 		#self.resource_groups = _get_resource_groups(self.scenario)
 		#group_resource = { R:R_group for R_group in self.resource_groups
 		#	for R in self.resource_groups[R_group] }
 
 		x = dict()  # mip variables
+		# resource -> period -> starts (T,t) of tasks which run in this period,
+		# this avoids scanning all variables for each capacity constraint
+		x_cover = collections.defaultdict(lambda: collections.defaultdict(list))
+		def add_cover(T,R,t):
+			for t_ in range(t,min(t+max(T.length,1),self.horizon)):
+				x_cover[R][t_].append((T,t))
 		cons = list()  # log of constraints for debugging
+		task_cons = dict()
+		windows = None
+		if self.prune:
+			windows = _get_task_windows(S, self.task_groups)
 		for T in self.task_groups:
 			task_group_size = len(self.task_groups[T])
 			# base time-indexed variables
@@ -113,13 +547,30 @@ class DiscreteMIP(object):
 				for R in RA ]
 			if task_resources_periods:
 				task_periods &= set.intersection(*task_resources_periods)
-			x.update({ (T,t) : mip.var(str((T, t)), 0, task_group_size, cat) for t in task_periods })
+			# restriction of the periods, a task group can use the periods of all its tasks
+			allowed_periods = None
+			if self.task_periods is not None:
+				group_periods = [ self.task_periods[T_] for T_ in self.task_groups[T]
+								  if T_ in self.task_periods ]
+				if group_periods:
+					allowed_periods = set().union(*group_periods)
+			if windows is not None:
+				est, lst = windows[T]
+				window_periods = set(range(est,lst+1))
+				if allowed_periods is not None:
+					allowed_periods &= window_periods
+				else:
+					allowed_periods = window_periods
+			if allowed_periods is not None:
+				task_periods &= allowed_periods
+			x.update({ (T,t) : self._var((T, t), 0, task_group_size, cat) for t in task_periods })
 			affine = [(x[T, t], 1) for t in task_periods ]
 			# check if task is required
 			if T.schedule_cost is None:
-				cons.append(mip.con(affine, sense=0, rhs=task_group_size))
+				task_cons[T] = mip.con(affine, sense=0, rhs=task_group_size)
 			else:
-				cons.append(mip.con(affine, sense=-1, rhs=task_group_size))
+				task_cons[T] = mip.con(affine, sense=-1, rhs=task_group_size)
+			cons.append(task_cons[T])
 
 			for RA in T.resources_req:
 				# check if contains a single resource
@@ -127,8 +578,13 @@ class DiscreteMIP(object):
 					continue
 
 				# create variables if necessary
-				x.update({ (T,R,t) : mip.var(str((T,R, t)),'Binary')
-						   for R in RA for t in S.get_periods(R) if (T,R,t) not in x})
+				for R in RA:
+					for t in S.get_periods(R):
+						if allowed_periods is not None and t not in allowed_periods:
+							continue
+						if (T,R,t) not in x:
+							x[T,R,t] = self._var((T, R, t))
+							add_cover(T,R,t)
 
 				'''
 				# create variables if necessary
@@ -146,9 +602,14 @@ class DiscreteMIP(object):
 					cons.append(mip.con(affine, sense=0, rhs=0))
 
 			# generate shortcuts for single resources
-			x.update({ (T,R,t) : x[T,t]
-				for RA in T.resources_req if len(RA) == 1
-				for R in RA for t in task_periods })
+			for RA in T.resources_req:
+				if len(RA) != 1:
+					continue
+				for R in RA:
+					for t in task_periods:
+						if (T,R,t) not in x:
+							add_cover(T,R,t)
+						x[T,R,t] = x[T,t]
 
 		# task requirements
 		for T in self.task_groups:
@@ -230,48 +691,76 @@ class DiscreteMIP(object):
 				cons.append(mip.con(affine, sense=-1, rhs=resource_size))
 		'''
 
-		# tasks are not allowed to be scheduled in the same resource at the same time
-		coeffs = { (T,R) : RA[R] for T in S.tasks() for RA in T.resources_req for R in RA }
-		for R in S.resources():
-			if R.size is not None:
-				resource_size = R.size
-			else:
-				resource_size = 1.0
+		# tasks are not allowed to be scheduled in the same resource at the same time,
+		# in lazy mode these rows are only added for overloaded periods during solving
+		self.x = x
+		self.x_cover = x_cover
+		self.capacity_coeffs = { (T,R) : RA[R] for T in S.tasks() for RA in T.resources_req for R in RA }
+		self.capacity_rows = set()
+		if not self.lazy_capacity:
+			for R in S.resources():
+				for t in range(self.horizon):
+					cons.append(self._add_capacity_row(R,t))
+				# case of task of length zero, then can block tasks of length > 1
+				if min( T.length for T in S.tasks() ) == 0:
+					for t in range(1,self.horizon):
+						cons.append(self._add_capacity_row(R,t,zero=True))
+
+		# projection on a specified resource for the case that some resource
+		# is selected. This ensures that only the variables from this resource
+		# are taken in the precedence constraints
+		def x_proj(T,R,t):
+			if R is not None and (T,R,t) in x:
+				return x[T,R,t]
+			return x.get((T,t))
+
+		def affine_proj(T,R,periods,coeff):
+			affine = list()
+			for t in periods:
+				var = x_proj(T,R,t)
+				if var is not None:
+					affine.append((var,coeff))
+			return affine
+
+		# step variables for the step formulation, steps[T,R,strict][t] is the number
+		# of starts of T (on resource R) before period t, None means no start
+		steps = dict()
+		def get_steps(T,R,strict=False):
+			if (T,R,strict) in steps:
+				return steps[T,R,strict]
+			y = [None]
 			for t in range(self.horizon):
-				# the max is for the case T.length == 1
-				affine = [ (x[T,R_,t_], coeffs[T,R])
-					for T,R_,t_ in ( _ for _ in x if len(_) == 3 )
-					if R_ == R and t+1-T.length <= t_ <= t
-					]
-				cons.append(mip.con(affine, sense=-1, rhs=resource_size))
-			# case of task of length zero, then can block tasks of length > 1
-			if min( T.length for T in S.tasks() ) == 0:
-				for t in range(1,self.horizon):
-					affine = [ (x[T,R_,t_], coeffs[T,R])
-						for T,R_,t_ in ( _ for _ in x if len(_) == 3 )
-						if R_ == R
-						and ( T.length == 0 or T.length > 1 )
-						and t+1-max(T.length,1) <= t_ <= t
-						]
-					cons.append(mip.con(affine, sense=-1, rhs=resource_size))
+				if strict:
+					var = x.get((T,R,t))
+				else:
+					var = x_proj(T,R,t)
+				if var is None:
+					y.append(y[-1])
+					continue
+				y_ = self._var((T,R,'step',strict,t+1), 0, len(self.task_groups[T]), 'Continuous')
+				affine = [(y_,1),(var,-1)]
+				if y[-1] is not None:
+					affine += [(y[-1],-1)]
+				cons.append(mip.con(affine, sense=0, rhs=0))
+				y.append(y_)
+			steps[T,R,strict] = y
+			return y
+
+		def step(T,R,t,coeff,strict=False):
+			# affine of the number of starts before period t
+			y = get_steps(T,R,strict)[min(max(t,0),self.horizon)]
+			if y is None:
+				return []
+			return [(y,coeff)]
+
+		def step_after(T,R,t,coeff,strict=False):
+			# affine of the number of starts in or after period t
+			return step(T,R,self.horizon,coeff,strict) + step(T,R,t,-coeff,strict)
 
 		# lax precedence constraints
 		for P in S.precs_lax():
 			if P.task_left not in self.task_groups or P.task_right not in self.task_groups:
 				continue
-			# make projection x_ on specified resource for the case
-			# that some resource is selected. This ensures that only
-			# the variables from this resources are taken in the
-			# constraints
-			x_ = copy.copy(x)
-			if P.resource_left is not None:
-				for t_ in range(self.horizon):
-					if (P.task_left,P.resource_left,t_) in x_:
-						x_[P.task_left,t_] = x_[P.task_left,P.resource_left,t_]
-			if P.resource_right is not None:
-				for t_ in range(self.horizon):
-					if (P.task_right,P.resource_right,t_) in x_:
-						x_[P.task_right,t_] = x_[P.task_right,P.resource_right,t_]
 			#in the default case it is expected that the task groups have
 			# similar size, so the first task in the left task group must be
 			# scheduled before the first task in the right task group, and so on
@@ -279,27 +768,24 @@ class DiscreteMIP(object):
 			right_size = float(len(self.task_groups[P.task_right]))
 			#if left_size == right_size or min(left_size,right_size) > 1:
 			for t in range(self.horizon) :
+				t_right = t+P.task_left.length+P.offset
 				# the fix one needs to be larger than the optional one
 				if P.resource_right is not None:
-					affine = \
-						[ (x_[P.task_left, t_],1/left_size)
-						for t_ in range(t)
-						if (P.task_left,t_) in x_ ]
-					affine += \
-						[ (x_[P.task_right, t_],-1/right_size)
-						for t_ in range(t+P.task_left.length+P.offset)
-						if (P.task_right,t_) in x_ ]
+					if self.formulation == 'step':
+						affine = step(P.task_left,P.resource_left,t,1/left_size)
+						affine += step(P.task_right,P.resource_right,t_right,-1/right_size)
+					else:
+						affine = affine_proj(P.task_left,P.resource_left,range(t),1/left_size)
+						affine += affine_proj(P.task_right,P.resource_right,range(t_right),-1/right_size)
 					cons.append(mip.con(affine, sense=1, rhs=0))
 				if ( P.resource_left is not None or
 					( P.resource_left is None and P.resource_right is None ) ):
-					affine = \
-						[ (x_[P.task_left, t_],1/left_size)
-						for t_ in range(t,self.horizon)
-						if (P.task_left,t_) in x_ ]
-					affine += \
-						[ (x_[P.task_right, t_],-1/right_size)
-						for t_ in range(t+P.task_left.length+P.offset,self.horizon)
-						if (P.task_right,t_) in x_ ]
+					if self.formulation == 'step':
+						affine = step_after(P.task_left,P.resource_left,t,1/left_size)
+						affine += step_after(P.task_right,P.resource_right,t_right,-1/right_size)
+					else:
+						affine = affine_proj(P.task_left,P.resource_left,range(t,self.horizon),1/left_size)
+						affine += affine_proj(P.task_right,P.resource_right,range(t_right,self.horizon),-1/right_size)
 					cons.append(mip.con(affine, sense=-1, rhs=0))
 			# for the case that only one of the task groups has one task,
 			# we need to distinguish two cases:
@@ -326,73 +812,32 @@ class DiscreteMIP(object):
 		for P in S.precs_tight():
 			if P.task_left not in self.task_groups or P.task_right not in self.task_groups:
 				continue
-
-			# create projection
-			x_ = copy.copy(x)
-			if P.resource_left is not None:
-				for t_ in range(self.horizon):
-					if (P.task_left,P.resource_left,t_) in x:
-						x_[P.task_left,t_] = x_[P.task_left,P.resource_left,t_]
-			if P.resource_right is not None:
-				for t_ in range(self.horizon):
-					if (P.task_right,P.resource_right,t_) in x:
-						x_[P.task_right,t_] = x_[P.task_right,P.resource_right,t_]
-
 			for t in range(self.horizon):
+				t_right = t+P.task_left.length+P.offset
 				affine = []
 				if (P.task_left,t) in x:
-					affine += [ (x_[P.task_left,t],1) ]
-				if (P.task_right,t+P.task_left.length+P.offset) in x:
-					affine += [ (x_[P.task_right,t+P.task_left.length+P.offset],-1) ]
+					affine += [ (x_proj(P.task_left,P.resource_left,t),1) ]
+				if (P.task_right,t_right) in x:
+					affine += [ (x_proj(P.task_right,P.resource_right,t_right),-1) ]
 				cons.append(mip.con(affine, sense=-1, rhs=0))
 
-		# low bounds
+		# bounds restrict the range of start periods, they are set as variable bounds
+		# such that they can be changed without touching the rows
+		start_bounds = { T : [0,self.horizon-1] for T in self.task_groups }
 		for P in S.bounds_low():
-			if P.task not in self.task_groups:
-				continue
-			affine = \
-				[ (x[P.task,t],1)
-				for t in range(P.bound)
-				if (P.task,t) in x ]
-			cons.append(mip.con(affine, sense=0, rhs=0))
-
-		# up bounds
+			if P.task in start_bounds:
+				start_bounds[P.task][0] = max(start_bounds[P.task][0],P.bound)
 		for P in S.bounds_up():
-			if P.task not in self.task_groups:
-				continue
-			affine = \
-				[ (x[P.task,t],1)
-				for t in range(max(P.bound-P.task.length+1,0),self.horizon)
-				if (P.task,t) in x ]
-			cons.append(mip.con(affine, sense=0, rhs=0))
-
-		# tight low bounds
+			if P.task in start_bounds:
+				start_bounds[P.task][1] = min(start_bounds[P.task][1],P.bound-P.task.length)
 		for P in S.bounds_low_tight():
-			if P.task not in self.task_groups:
-				continue
-			affine = \
-				[ (x[P.task,t],1)
-				for t in range(P.bound)
-				if (P.task,t) in x ]
-			affine += \
-				[ (x[P.task,t],1)
-				for t in range(P.bound+1,self.horizon)
-				if (P.task,t) in x ]
-			cons.append(mip.con(affine, sense=0, rhs=0))
-
-		# tight up bounds
+			if P.task in start_bounds:
+				start_bounds[P.task][0] = max(start_bounds[P.task][0],P.bound)
+				start_bounds[P.task][1] = min(start_bounds[P.task][1],P.bound)
 		for P in S.bounds_up_tight():
-			if P.task not in self.task_groups:
-				continue
-			affine = \
-				[ (x[P.task,t],1)
-				for t in range(P.bound-P.task.length)
-				if (P.task,t) in x ]
-			affine += \
-				[ (x[P.task,t],1)
-				for t in range(P.bound-P.task.length+1,self.horizon)
-				if (P.task,t) in x ]
-			cons.append(mip.con(affine, sense=0, rhs=0))
+			if P.task in start_bounds:
+				start_bounds[P.task][0] = max(start_bounds[P.task][0],P.bound-P.task.length)
+				start_bounds[P.task][1] = min(start_bounds[P.task][1],P.bound-P.task.length)
 
 		# conditional precedence constraints
 		for P in S.precs_cond():
@@ -408,51 +853,63 @@ class DiscreteMIP(object):
 						# no slack in the next constraint (1 in coefficient), and
 						# then the monotonicity defined by -1*(t_<t-P.offset-P.task_left.length)
 						# needs to get satisfied
-						affine = \
-							[ (x[P.task_left, R, t_],1-1*(t_<t-P.offset-P.task_left.length))
-							for t_ in range(self.horizon)
-							if (P.task_left, R, t_) in x ]
-						affine += \
-							[ (x[P.task_right, R, t_],1/right_size)
-							for t_ in range(self.horizon)
-							if (P.task_right, R, t_) in x
-							and t_ < t ]
+						if self.formulation == 'step':
+							affine = step_after(P.task_left,R,t-P.offset-P.task_left.length,1,strict=True)
+							affine += step(P.task_right,R,t,1/right_size,strict=True)
+						else:
+							affine = \
+								[ (x[P.task_left, R, t_],1-1*(t_<t-P.offset-P.task_left.length))
+								for t_ in range(self.horizon)
+								if (P.task_left, R, t_) in x ]
+							affine += \
+								[ (x[P.task_right, R, t_],1/right_size)
+								for t_ in range(self.horizon)
+								if (P.task_right, R, t_) in x
+								and t_ < t ]
 						cons.append(mip.con(affine, sense=-1, rhs=1))
 				elif right_size == 1:
 					for t in range(self.horizon):
-						affine = \
-							[ (x[P.task_left, R, t_],1/left_size)
-							for t_ in range(self.horizon)
-							if (P.task_left, R, t_) in x
-							and t_ >= t ]
-						affine += \
-							[ (x[P.task_right, R, t_],1-1*(t_>=t+P.offset+P.task_left.length))
-							for t_ in range(self.horizon)
-							if (P.task_right, R, t_) in x ]
+						if self.formulation == 'step':
+							affine = step_after(P.task_left,R,t,1/left_size,strict=True)
+							affine += step(P.task_right,R,t+P.offset+P.task_left.length,1,strict=True)
+						else:
+							affine = \
+								[ (x[P.task_left, R, t_],1/left_size)
+								for t_ in range(self.horizon)
+								if (P.task_left, R, t_) in x
+								and t_ >= t ]
+							affine += \
+								[ (x[P.task_right, R, t_],1-1*(t_>=t+P.offset+P.task_left.length))
+								for t_ in range(self.horizon)
+								if (P.task_right, R, t_) in x ]
 						cons.append(mip.con(affine, sense=-1, rhs=1))
 				else:
 					print('ERROR: at least one task group in conditional precedence constraint should have size 1')
 
+		# weights of slices, the overlap of a slice and a start only depends
+		# on the length of the task, so it is shared by all tasks of this length
+		overlaps = dict()
+		def slice_weights(SL,T):
+			if not SL._param in T:
+				return []
+			w = T[SL._param]
+			if not w:
+				return []
+			if (id(SL),T.length) not in overlaps:
+				overlaps[id(SL),T.length] = SL.overlaps(T.length,self.horizon)
+			return [ (t,w*fraction) for t,fraction in overlaps[id(SL),T.length] ]
+
 		#capacities
 		count = 0 #to distinguish variables
 		for C in S.capacity():
 			affines = list()
 			for SL in C.slices_sum():
 				R = SL.resource
-				if SL._start is not None:
-					start = SL._start
-				else:
-					start = 0
-				if SL._end is not None:
-					end = SL._end
-				else:
-					end = S.horizon
 				coeff = C.SLA[SL]
-				affine = [ (x[T,R,t], coeff*SL.weight(T,t))
+				affine = [ (x[T,R,t], coeff*w)
 						  for T in self.task_groups
-						  for t in range(start-T.length+1,end)
-						  if (T,R,t) in x
-						  and SL.weight(T,t) ]
+						  for t,w in slice_weights(SL,T)
+						  if (T,R,t) in x ]
 				if not affine:
 					continue
 				affines += affine
@@ -460,23 +917,15 @@ class DiscreteMIP(object):
 			# max slices
 			for SL in C.slices_max():
 				R = SL.resource
-				if SL._start is not None:
-					start = SL._start
-				else:
-					start = 0
-				if SL._end is not None:
-					end = SL._end
-				else:
-					end = S.horizon
 				affines_ = list()
 				coeff = C.SLA[SL] #TODO: is muliplying here correct as for sum
 				for T in self.task_groups:
-					for t in range(start-T.length+1,end):
-						if (T,R,t) in x and SL.weight(T,t):
-							affine_ = [ (x[T,R,t], coeff*SL.weight(T,t)) ]
+					for t,w in slice_weights(SL,T):
+						if (T,R,t) in x:
+							affine_ = [ (x[T,R,t], coeff*w) ]
 							affines_.append(affine_)
 				if affines_:
-					x['cap_%i'%count,R] = mip.var(str(('cap_%i'%count,R)), 0, C.bound)
+					x['cap_%i'%count,R] = self._var(('cap_%i'%count,R), 0, C.bound)
 					x_ = x['cap_%i'%count,R]
 					count += 1
 					affines += [ (x_,1) ]
@@ -488,6 +937,8 @@ class DiscreteMIP(object):
 			# diff slices
 			for SL in C.slices_diff():
 				R = SL.resource
+				diff_tasks = [ T for T in self.task_groups
+							   if SL.weight(T) and R in S.resources(task=T) ]
 
 				def add_diff_con(count,SL,t,flip):
 					coeff = C.SLA[SL] #TODO: is muliplying here correct as for sum
@@ -499,9 +950,12 @@ class DiscreteMIP(object):
 						[ (x[T,R,t+1],-flip*SL.weight(T))
 						for T in self.task_groups
 						if (T,R,t+1) in x and SL.weight(T) ]
-					if affine_1 and affine_2:
+					# whether the row exists only depends on the scenario and not on the
+					# variables, since these can be restricted by pruning or refinement
+					if any( t-T.length+1 >= 0 for T in diff_tasks ) and t+1 < self.horizon and \
+					   (affine_1 or affine_2):
 						if ('cap_%i'%count,R,t) not in x:
-							x['cap_%i'%count,R,t] = mip.var(str(('cap_%i'%count,R, t)), 0, C.bound)
+							x['cap_%i'%count,R,t] = self._var(('cap_%i'%count,R, t), 0, C.bound)
 						affine = affine_1 + affine_2 + [ (x['cap_%i'%count,R,t],1) ]
 						con = mip.con(affine, sense=1, rhs=0)
 						cons.append(con)
@@ -528,6 +982,68 @@ class DiscreteMIP(object):
 				cons.append(mip.con(affines, sense=-1, rhs=C.bound))
 
 
+		self.mip = mip
+		self.task_cons = task_cons
+
+		objective = list()
+		for T in self.task_groups:
+			objective += self._task_objective(T)
+		mip.obj(objective)
+		'''
+		for con in cons:
+			mip.add_con(con)
+		'''
+
+		self.start_bounds = start_bounds
+		self.start_bounds_scenario = { T : tuple(start_bounds[T]) for T in start_bounds }
+		for T in self.task_groups:
+			self._set_start_bounds(T)
+
+	def _capacity_affine(self, R, t, zero=False):
+		# zero is the row for tasks of length zero, which can block tasks of length > 1
+		x = self.x
+		coeffs = self.capacity_coeffs
+		if zero:
+			return [ (x[T,R,t_], coeffs[T,R]) for T,t_ in self.x_cover[R][t] if T.length != 1 ]
+		return [ (x[T,R,t_], coeffs[T,R]) for T,t_ in self.x_cover[R][t] if T.length >= 1 ]
+
+	def _add_capacity_row(self, R, t, zero=False):
+		resource_size = 1.0
+		if R.size is not None:
+			resource_size = R.size
+		self.capacity_rows.add((R,t,zero))
+		return self.mip.con(self._capacity_affine(R,t,zero), sense=-1, rhs=resource_size)
+
+	def _add_violated_capacity_rows(self):
+		"""
+		adds the capacity rows of all periods which are overloaded in the current
+		solution of the mip, and returns the number of added rows
+		"""
+		S = self.scenario
+		zero_tasks = min( T.length for T in S.tasks() ) == 0
+		count = 0
+		for R in S.resources():
+			resource_size = 1.0
+			if R.size is not None:
+				resource_size = R.size
+			keys = [ (t,False) for t in range(self.horizon) ]
+			if zero_tasks:
+				keys += [ (t,True) for t in range(1,self.horizon) ]
+			for t,zero in keys:
+				if (R,t,zero) in self.capacity_rows:
+					continue
+				load = sum( coeff*(self.mip.value(var) or 0) for var,coeff in self._capacity_affine(R,t,zero) )
+				if load > resource_size + 1e-6:
+					self._add_capacity_row(R,t,zero)
+					count += 1
+		return count
+
+	def _task_objective(self, T):
+		"""
+		returns the objective of the variables of task group T
+		"""
+		S = self.scenario
+		x = self.x
 		def task2cost(T,t):
 			cost = 0
 			if T.delay_cost is not None:
@@ -539,8 +1055,6 @@ class DiscreteMIP(object):
 		# delay and schedule costs of tasks
 		objective = [
 			(x[T, t], task2cost(T,t))
-			for T in S.tasks()
-			if T in self.task_groups
 			for t in S.get_periods(T) if (T,t) in x
 			]
 
@@ -548,63 +1062,461 @@ class DiscreteMIP(object):
 		objective += [
 			(x[T,R,t],R.cost_per_period*T.length)
 			for R in S.resources() if R.cost_per_period is not None
-			for T in S.tasks(resource=R)
 			for t in S.get_periods(R)
 			if (T,R,t) in x
 			]
+		return objective
 
-		mip.obj(objective)
-		'''
-		for con in cons:
-			mip.add_con(con)
-		'''
-		self.mip = mip
-		self.x = x
+	def _set_start_bounds(self, T):
+		# variables outside the range of start periods are fixed to zero
+		low, up = self.start_bounds[T]
+		task_group_size = len(self.task_groups[T])
+		for t in range(self.horizon):
+			if (T,t) not in self.x:
+				continue
+			if low <= t <= up:
+				self.mip.set_bounds(self.x[T,t], 0, task_group_size)
+			else:
+				self.mip.set_bounds(self.x[T,t], 0, 0)
+
+	def _get_task_group(self, T):
+		if isinstance(T,str):
+			T = self.scenario[T]
+		for T_ in self.task_groups:
+			if T in self.task_groups[T_]:
+				return T_
+		raise Exception('ERROR: task ' + str(T) + ' is not part of the compiled scenario')
+
+	def set_bounds(self, T, low=None, up=None):
+		"""
+		Replaces the bounds of the task group of T, such that the start is at
+		least low and the end is at most up, None means no bound
+		"""
+		T = self._get_task_group(T)
+		if low is None:
+			low = 0
+		if up is None:
+			up = self.horizon-1
+		else:
+			up -= T.length
+		self.start_bounds[T] = [low, up]
+		self._set_start_bounds(T)
+
+	def fix_task(self, T, start):
+		"""
+		Fixes the start of the task group of T
+		"""
+		T = self._get_task_group(T)
+		self.start_bounds[T] = [start, start]
+		self._set_start_bounds(T)
+
+	def release_task(self, T):
+		"""
+		Resets the bounds of the task group of T to the ones given in the scenario
+		"""
+		T = self._get_task_group(T)
+		self.start_bounds[T] = list(self.start_bounds_scenario[T])
+		self._set_start_bounds(T)
+
+	def _set_task_objective(self, T):
+		objective = dict()
+		for var, coeff in self._task_objective(T):
+			objective[var] = objective.get(var,0) + coeff
+		for var in objective:
+			self.mip.set_obj_coeff(var, objective[var])
+
+	def set_delay_cost(self, T, delay_cost):
+		"""
+		Sets the delay cost of all tasks in the task group of T
+		"""
+		T = self._get_task_group(T)
+		for T_ in self.task_groups[T]:
+			T_.delay_cost = delay_cost
+		self._set_task_objective(T)
+
+	def set_schedule_cost(self, T, schedule_cost):
+		"""
+		Sets the schedule cost of all tasks in the task group of T, None means
+		that the tasks are required
+		"""
+		T = self._get_task_group(T)
+		for T_ in self.task_groups[T]:
+			T_.schedule_cost = schedule_cost
+		if schedule_cost is None:
+			self.mip.set_sense(self.task_cons[T], 0)
+		else:
+			self.mip.set_sense(self.task_cons[T], -1)
+		self._set_task_objective(T)
 
 
 	def read_solution_from_mip(self, msg=0):
+		# bucket the number of starts by task group, period and resource, only the
+		# nonzero variables are read and mapped back by their keys. The variable of
+		# a task group and period also counts for all single resources of the task
+		single_resources = { T : [ R for RA in T.resources_req if len(RA) == 1 for R in RA ]
+							 for T in self.task_groups }
+		starts = { T : collections.defaultdict(collections.Counter) for T in self.task_groups }
+		for i,value in self.mip.nonzeros():
+			key = self.var_keys[i]
+			if not isinstance(key[0],Task) or key[0] not in starts:
+				continue
+			count = int(round(value))
+			if count <= 0:
+				continue
+			if len(key) == 2:
+				T, t = key
+				for R in single_resources[T]:
+					starts[T][t][R] += count
+			elif len(key) == 3 and isinstance(key[1],Resource):
+				T, R, t = key
+				# the variables of single resources are replaced by the task variable
+				if R not in single_resources[T]:
+					starts[T][t][R] += count
+
 		for T in self.task_groups:
-			# get all possible starts with combined resources
-			starts = \
-				[ (t,R)
-				for t in range(self.horizon)
-				for R in self.scenario.resources()
-				if (T,R,t) in self.x and self.mip.value(self.x[T, R, t]) is not None
-				for i in range(int(self.mip.value(self.x[T, R, t])))
-				]
-			# sort according to time
-			starts = sorted(starts,key=lambda x:x[0])
-
-			# iteratively assign starts and resources
+			# iteratively assign starts and resources in the order of the periods
+			periods = sorted(starts[T])
+			k = 0
 			for T_ in self.task_groups[T]:
 				# reset values
 				T_.start_value = None
 				T_.resources = list()
+				while k < len(periods) and not +starts[T][periods[k]]:
+					k += 1
 				# in case of not required tasks with schedule_cost, there might be less starts than tasks
-				if not starts:
-					break
+				if k == len(periods):
+					continue
+				t = periods[k]
 				# consider single resources first
 				RAs = [ RA for RA in T_.resources_req if len(RA) == 1 ] + \
 					  [ RA for RA in T_.resources_req if len(RA) > 1  ]
-				T_.start_value = [ t for (t, R) in starts ][0]
+				T_.start_value = t
 				for RA in RAs :
 					if set(T_.resources) & set(RA):
 						continue
-					(t, R) = [(t_, R_) for (t_, R_) in starts if R_ in RA and t_ == T_.start_value][0]
-					starts.remove((t, R))
-					T_.resources.append(R)
+					for R in RA:
+						if starts[T][t][R] > 0:
+							starts[T][t][R] -= 1
+							T_.resources.append(R)
+							break
+
+
+
+	def _check_relax(self):
+		S = self.scenario
+		if S.capacity():
+			raise Exception('ERROR: relax does not support capacity constraints')
+		if S.precs_cond():
+			raise Exception('ERROR: relax does not support conditional precedence constraints')
+		if any( T.tasks_req for T in S.tasks() ):
+			raise Exception('ERROR: relax does not support task requirements')
+		for P in S.precs_lax() + S.precs_tight():
+			if len(self.task_groups.get(P.task_left,[])) > 1 or len(self.task_groups.get(P.task_right,[])) > 1:
+				raise Exception('ERROR: relax does not support precedence constraints of task groups')
+
+	def round_solution_from_mip(self, alpha=0.5, msg=0):
+		"""
+		Builds an integral schedule from the fractional solution of the lp relaxation
+		and writes it to the scenario. The alpha-point of a task is the first period
+		where the cumulative fraction of its starts reaches alpha. The tasks are then
+		scheduled in the order of their alpha-points at the earliest start which respects
+		the precedence constraints, bounds and resource capacities. Returns 1 if all
+		required tasks are scheduled, otherwise 0
+		"""
+		S = self.scenario
+		x = self.x
+		value = self.mip.value
+
+		# alpha-points, the i-th task of a group uses the i-th unit of the starts of its group
+		group = dict()
+		alpha_points = dict()
+		for T in self.task_groups:
+			members = list(self.task_groups[T])
+			for T_ in members:
+				group[T_] = T
+			fraction = 0.0
+			i = 0
+			for t in range(self.horizon):
+				if (T,t) not in x:
+					continue
+				fraction += value(x[T,t]) or 0
+				while i < len(members) and fraction >= i + alpha - 1e-6:
+					alpha_points[members[i]] = t
+					i += 1
+
+		resource_fraction = collections.defaultdict(float)
+		for key in x:
+			if len(key) == 3 and key[0] in self.task_groups:
+				resource_fraction[key[0],key[1]] += value(x[key]) or 0
+
+		# precedences, the left and right tasks are the representatives of groups of size one
+		precs = [ (P,False) for P in S.precs_lax() ] + [ (P,True) for P in S.precs_tight() ]
+		precs = [ (P,tight) for P,tight in precs
+				  if P.task_left in self.task_groups and P.task_right in self.task_groups ]
+
+		# optional tasks which are forced by scheduled tasks in precedences
+		changed = True
+		while changed:
+			changed = False
+			for P,tight in precs:
+				forward = tight or P.resource_left is not None or P.resource_right is None
+				backward = not tight and P.resource_right is not None
+				if forward and P.task_left in alpha_points and P.task_right not in alpha_points:
+					alpha_points[P.task_right] = alpha_points[P.task_left]
+					changed = True
+				if backward and P.task_right in alpha_points and P.task_left not in alpha_points:
+					alpha_points[P.task_left] = alpha_points[P.task_right]
+					changed = True
+
+		# only precedences without resources define the order of the list scheduling, all
+		# precedences are checked against the other task once it is scheduled or skipped
+		task_precs = collections.defaultdict(list)
+		preds = collections.defaultdict(list)
+		succs = collections.defaultdict(list)
+		for P,tight in precs:
+			if P.task_left in alpha_points and P.task_right in alpha_points:
+				task_precs[P.task_left].append((P,tight))
+				task_precs[P.task_right].append((P,tight))
+				if P.resource_left is None and P.resource_right is None:
+					preds[P.task_right].append(P.task_left)
+					succs[P.task_left].append(P.task_right)
+
+		T_start = dict()
+		T_resources = dict()
+		skipped = set()
+
+		load = collections.defaultdict(lambda: collections.defaultdict(float))
+		def fits(T,R,t):
+			size = 1.0
+			if R.size is not None:
+				size = R.size
+			coeff = self.capacity_coeffs[group[T],R]
+			# like the capacity rows, a task of length zero loads no period
+			return all( load[R][t_] + coeff <= size + 1e-6
+						for t_ in range(t,min(t+T.length,self.horizon)) )
+
+		def on(T,R,t,resources):
+			# the precedence uses the start of T on R, or the start of T if T cannot use R
+			return R is None or R in resources or (group[T],R,t) not in x
+
+		def prec_requirements(T,t):
+			# returns the resources which T needs to use, must not use and should not use
+			# to start in period t, or None if T cannot start in period t
+			G = group[T]
+			required = set()
+			forbidden = set()
+			avoided = set()
+			for P,tight in task_precs[T]:
+				forward = tight or P.resource_left is not None or P.resource_right is None
+				backward = not tight and P.resource_right is not None
+				if P.task_right == T:
+					T_ = P.task_left
+					if T_ in T_start:
+						left_on = on(T_,P.resource_left,T_start[T_],T_resources[T_])
+						t_right = T_start[T_] + T_.length + P.offset
+						in_time = t == t_right if tight else t >= t_right
+					elif T_ in skipped:
+						left_on = in_time = False
+					else:
+						# the left task would need to start before T on this resource
+						if backward:
+							avoided.add(P.resource_right)
+						continue
+					if forward and left_on:
+						if not in_time:
+							return None
+						if P.resource_right is not None and (G,P.resource_right,t) in x:
+							required.add(P.resource_right)
+					if backward and not (left_on and in_time):
+						if (G,P.resource_right,t) not in x:
+							return None
+						forbidden.add(P.resource_right)
+				else:
+					T_ = P.task_right
+					if T_ in T_start:
+						right_on = on(T_,P.resource_right,T_start[T_],T_resources[T_])
+						t_right = t + T.length + P.offset
+						in_time = T_start[T_] == t_right if tight else T_start[T_] >= t_right
+					elif T_ in skipped:
+						right_on = in_time = False
+					else:
+						continue
+					if forward and not (right_on and in_time):
+						if P.resource_left is None or (G,P.resource_left,t) not in x:
+							return None
+						forbidden.add(P.resource_left)
+					if backward and right_on:
+						if not in_time:
+							return None
+						if P.resource_left is not None and (G,P.resource_left,t) in x:
+							required.add(P.resource_left)
+			if required & forbidden:
+				return None
+			return required, forbidden, avoided
+
+		def place(T,t,strict):
+			# returns the resources of T if it can start in period t, otherwise None,
+			# if strict, then resources which should not be used are not used
+			G = group[T]
+			if (G,t) not in x or not self.start_bounds[G][0] <= t <= self.start_bounds[G][1]:
+				return None
+			requirements = prec_requirements(T,t)
+			if requirements is None:
+				return None
+			required, forbidden, avoided = requirements
+			resources = list()
+			RAs = [ RA for RA in T.resources_req if len(RA) == 1 ] + \
+				  [ RA for RA in T.resources_req if len(RA) > 1 ]
+			for RA in RAs:
+				if set(resources) & set(RA):
+					continue
+				candidates = [ R for R in RA if (G,R,t) in x and R not in forbidden and fits(T,R,t) ]
+				if set(candidates) & required:
+					candidates = [ R for R in candidates if R in required ]
+				elif strict or set(candidates) - avoided:
+					candidates = [ R for R in candidates if R not in avoided ]
+				if not candidates:
+					return None
+				# prefer the resource which is used most in the lp relaxation
+				resources.append(min(candidates,key=lambda R: (-resource_fraction[G,R], R.cost_per_period or 0)))
+			if required - set(resources):
+				return None
+			return resources
 
+		def can_skip(T):
+			# an optional task can be skipped if no scheduled task requires it
+			if T.schedule_cost is None:
+				return False
+			for P,tight in task_precs[T]:
+				forward = tight or P.resource_left is not None or P.resource_right is None
+				backward = not tight and P.resource_right is not None
+				if P.task_right == T and forward and P.task_left in T_start and \
+				   on(P.task_left,P.resource_left,T_start[P.task_left],T_resources[P.task_left]):
+					return False
+				if P.task_left == T and backward and P.task_right in T_start and \
+				   on(P.task_right,P.resource_right,T_start[P.task_right],T_resources[P.task_right]):
+					return False
+			return True
 
+		# list scheduling in the order of the alpha-points, the predecessors come first
+		order = { T : i for i,T in enumerate(S.tasks()) }
+		num_preds = { T : len(preds[T]) for T in alpha_points }
+		heap = [ (alpha_points[T],order[T],T) for T in alpha_points if not num_preds[T] ]
+		heapq.heapify(heap)
+		while heap:
+			alpha_point, i, T = heapq.heappop(heap)
+			resources = None
+			for strict in [True,False]:
+				for t in range(self.horizon):
+					resources = place(T,t,strict)
+					if resources is not None:
+						break
+				if resources is not None:
+					break
+			if resources is not None:
+				T_start[T] = t
+				T_resources[T] = resources
+				for R in resources:
+					for t_ in range(t,min(t+T.length,self.horizon)):
+						load[R][t_] += self.capacity_coeffs[group[T],R]
+			elif can_skip(T):
+				skipped.add(T)
+			else:
+				if msg:
+					print('ERROR: no feasible start for task %s in rounding' % T.name)
+				return 0
+			for T_ in succs[T]:
+				num_preds[T_] -= 1
+				if not num_preds[T_]:
+					heapq.heappush(heap,(alpha_points[T_],order[T_],T_))
+		if any( num_preds[T] for T in alpha_points ):
+			if msg:
+				print('ERROR: cyclic precedence constraints in rounding')
+			return 0
+		if any( T.schedule_cost is None and T not in T_start for T in group ):
+			if msg:
+				print('ERROR: required task not scheduled in rounding')
+			return 0
 
-	def solve(self, scenario, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, msg=0):
+		for T in S.tasks():
+			if T not in group:
+				continue
+			T.start_value = T_start.get(T)
+			T.resources = T_resources.get(T,list())
+		return 1
 
+	def compile(self, scenario, msg=0):
 		self.scenario = scenario
 		if self.scenario.horizon is None:
 			raise Exception('ERROR: solver requires scenarios with defined horizon')
 			return 0
 		self.horizon = self.scenario.horizon
+		start_time = time.time()
 		self.build_mip_from_scenario(msg=msg)
+		self.build_time = time.time() - start_time
+		return self
+
+	def write(self, filename):
+		"""
+		Writes the compiled mip to a file, see solvers.mip.write
+		"""
+		self.mip.write(filename)
+
+	def read(self, filename, msg=0):
+		"""
+		Reads a solution file of the compiled mip and writes the solution back
+		to the scenario, see solvers.mip.read
+		"""
+		self.mip.read_solution(filename)
+		if self.mip.status() == 1:
+			self.read_solution_from_mip(msg=msg)
+			return 1
+		if msg:
+			print('ERROR: no solution found')
+		return 0
+
+	def set_warm_start(self):
+		"""
+		Sets the start values of the task variables according to the start_value
+		and resources of the tasks in the scenario
+		"""
+		x = self.x
+		for T in self.task_groups:
+			starts = collections.Counter()
+			for T_ in self.task_groups[T]:
+				if T_.start_value is None:
+					continue
+				starts[T_.start_value] += 1
+				for R in T_.resources or []:
+					starts[R,T_.start_value] += 1
+			for t in range(self.horizon):
+				if (T,t) in x:
+					self.mip.set_start(x[T,t], starts[t])
+			for RA in T.resources_req:
+				if len(RA) <= 1:
+					continue
+				for R in RA:
+					for t in range(self.horizon):
+						if (T,R,t) in x:
+							self.mip.set_start(x[T,R,t], starts[R,t])
+
+	def solve(self, scenario, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, warm_start=False,
+			  threads=None, msg=0):
+		self.compile(scenario, msg=msg)
+		return self.resolve(kind=kind, time_limit=time_limit, random_seed=random_seed, ratio_gap=ratio_gap,
+							warm_start=warm_start, threads=threads, msg=msg)
 
+	def resolve(self, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, warm_start=False,
+				threads=None, msg=0):
+		"""
+		Solves the compiled mip with its current bounds and costs, and writes
+		the solution back to the scenario. If warm_start is set, then the current
+		solution in the scenario is used as initial solution
+		"""
+		if self.relax:
+			self._check_relax()
+		if warm_start:
+			self.set_warm_start()
 		# if time_limit :
 		#   options += ['sec',str(time_limit),'ratioGap',str(0.1),'cuts','off',
 				#       'heur','on','preprocess','on','feas','on']#,'maxNodes',str(0),'feas','both','doh','solve']
@@ -617,7 +1529,48 @@ class DiscreteMIP(object):
 		#params['cuts'] = 'off'
 		params['ratio_gap'] = str(ratio_gap)
 		params['kind'] = kind
+		params['warm_start'] = warm_start
+		if threads is not None:
+			params['threads'] = threads
+		if self.relax:
+			params['relax'] = True
+		start_time = time.time()
 		self.mip.solve(msg=msg,**params)
+		# in lazy mode add the rows of overloaded periods and solve again
+		while self.lazy_capacity and self.mip.status() == 1:
+			count = self._add_violated_capacity_rows()
+			if not count:
+				break
+			if msg:
+				print('INFO: add %i capacity rows of overloaded periods'%count)
+			if time_limit is not None:
+				params['time_limit'] = time_limit - (time.time() - start_time)
+				if params['time_limit'] <= 0:
+					self.mip.stats.status = stats.NOT_SOLVED
+					if msg:
+						print('ERROR: time limit reached before all capacity rows were added')
+					self.scenario.solve_stats = self.mip.stats
+					return 0
+			self.mip.solve(msg=msg,**params)
+		self.mip.stats.build_time = self.build_time
+		self.mip.stats.solve_time = time.time() - start_time
+		self.scenario.solve_stats = self.mip.stats
+
+		# the objective of the lp relaxation is a lower bound for the rounded solution
+		if self.relax and self.mip.status() == 1:
+			solve_stats = self.scenario.solve_stats
+			best_bound = solve_stats.objective
+			solve_stats.objective = None
+			solve_stats.status = stats.NOT_SOLVED
+			if self.round_solution_from_mip(msg=msg):
+				solve_stats.objective = stats.objective_value(self.scenario)
+				solve_stats.status = stats.FEASIBLE
+				if msg:
+					print('INFO: objective of rounded solution = %s, lp bound = %s'%
+						  (str(solve_stats.objective),str(best_bound)))
+			solve_stats.set_bound(best_bound)
+			solve_stats.solve_time = time.time() - start_time
+			return int(solve_stats.status == stats.FEASIBLE)
 
 		#print([ self.x[scenario['T1_e'],scenario['R1'],i].value() for i in range(scenario.horizon) ])
 		#print([ self.x[scenario['T0'],scenario['R1'],i].value() for i in range(scenario.horizon) ])
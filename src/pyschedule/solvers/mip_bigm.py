@@ -24,21 +24,49 @@ under the License.
 '''
 
 from .mip_pulp import MIP
+from . import mip_matrix
+from .mip import _get_task_windows, _get_resource_pools, _pool_resources, _split_pools
 import collections
+import time
 
 
 
-def solve(scenario, bigm=10000, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, msg=0):
+def _get_mip(scenario, backend=None, kind='CBC'):
+	# HiGHS is called in-process with the matrix of the model
+	if backend is None:
+		backend = 'matrix' if kind == 'HIGHS' else 'pulp'
+	if backend == 'pulp':
+		return MIP(str(scenario))
+	elif backend == 'matrix':
+		return mip_matrix.MIP(scenario.name)
+	raise Exception('ERROR: mip backend ' + str(backend) + ' not known')
+
+
+def solve(scenario, bigm=10000, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, warm_start=False,
+		  backend=None, threads=None, pool_resources=False, msg=0):
 	"""
-	Solves the given scenario using a bigm-type MIP
+	Solves the given scenario using a bigm-type MIP. Unary resources are modelled by
+	disjunctions and cumulative resources by a resource flow, so the size of the model
+	does not depend on the horizon. Capacity constraints with slices are not supported
 
 	Args:
 		scenario:    scenario to solve
-		kind:        MIP-solver to use: CPLEX, GLPK, CBC or SCIP
-		bigm :       a large number to allow a big-m type model
-		time_limit:  a time limit, only for CPLEX, CBC and SCIP
+		kind:        MIP-solver to use: CPLEX, GLPK, CBC, SCIP or HIGHS (in-process via scipy,
+		             requires the matrix backend)
+		bigm :       a large number to allow a big-m type model, only used if the scenario
+		             has no horizon, otherwise the big-m of each disjunction is computed
+		             from the start windows of the tasks
+		time_limit:  a time limit, only for CPLEX, CBC, SCIP and HIGHS
 		random_seed: random_seed
 		ratio_gap:   MIP-gap
+		warm_start:  use the current start_value and resources of the tasks as initial solution,
+		             only for CBC, CPLEX and GUROBI
+		backend:     pulp (default) builds pulp objects, matrix assembles the model in sparse
+		             arrays and passes it as a matrix to the solver (only CBC and HIGHS),
+		             default is matrix for HIGHS and pulp otherwise
+		threads:     number of threads, only for CBC, SCIP, GUROBI and CPLEX
+		pool_resources: model interchangeable resources as one cumulative resource with a
+		             resource flow and assign the tasks to the individual resources after solving
 		msg:         0 means no feedback (default) during computation, 1 means feedback
 
 	Returns:
@@ -47,9 +75,75 @@ def solve(scenario, bigm=10000, kind='CBC', time_limit=None, random_seed=None, r
 	"""
 
 	scenario.check()
-	mip = MIP(str(scenario))
+	if pool_resources:
+		pools = _get_resource_pools(scenario)
+		if pools:
+			if msg:
+				print('INFO: pool resources '+', '.join( '|'.join( R.name for R in members ) for members in pools ))
+			scenario_pooled = _pool_resources(scenario, pools)
+			success = solve(scenario_pooled, bigm=bigm, kind=kind, time_limit=time_limit, random_seed=random_seed,
+							ratio_gap=ratio_gap, warm_start=warm_start, backend=backend, threads=threads,
+							pool_resources=False, msg=msg)
+			scenario.solve_stats = scenario_pooled.solve_stats
+			if not success:
+				return 0
+			_split_pools(scenario, scenario_pooled, pools)
+			return 1
+	mip = _get_mip(scenario, backend=backend, kind=kind)
 	return ContinuousMIP(mip).solve(scenario, bigm=bigm, kind=kind, time_limit=time_limit, random_seed=random_seed,
-									ratio_gap=ratio_gap, msg=msg)
+									ratio_gap=ratio_gap, warm_start=warm_start, threads=threads, msg=msg)
+
+
+def write(scenario, filename, bigm=10000, msg=0):
+	"""
+	Writes the bigm-type MIP of the given scenario to a file without building pulp
+	objects, the solution of an external solver can be loaded with read
+
+	Args:
+		scenario:    scenario to write
+		filename:    name of the file, the format is lp if the name ends with .lp or .lp.gz
+		             and mps otherwise, files ending with .gz are compressed
+		bigm :       a large number to allow a big-m type model, only used if the scenario
+		             has no horizon
+		msg:         0 means no feedback (default) during computation, 1 means feedback
+
+	Returns:
+		the ContinuousMIP
+	"""
+	scenario.check()
+	mip = _get_mip(scenario, backend='matrix')
+	model = ContinuousMIP(mip).compile(scenario, bigm=bigm, msg=msg)
+	model.mip.write(filename)
+	return model
+
+
+def read(scenario, filename, bigm=10000, msg=0):
+	"""
+	Reads the solution file of a model written by write into the scenario. The model
+	is rebuilt from the scenario, so the scenario and the parameters need to be the
+	same as for write
+
+	Args:
+		scenario:    scenario to load the solution into
+		filename:    name of the solution file in the format of cbc, or with lines of the
+		             form name value, files ending with .gz are decompressed
+		bigm :       see write
+		msg:         0 means no feedback (default) during computation, 1 means feedback
+
+	Returns:
+		1 if the file contains a solution
+		0 otherwise
+	"""
+	scenario.check()
+	mip = _get_mip(scenario, backend='matrix')
+	model = ContinuousMIP(mip).compile(scenario, bigm=bigm, msg=msg)
+	model.mip.read_solution(filename)
+	if model.mip.status() == 1:
+		model.read_solution_from_mip(msg=msg)
+		return 1
+	if msg:
+		print('ERROR: no solution found')
+	return 0
 
 
 class ContinuousMIP(object):
@@ -63,7 +157,19 @@ class ContinuousMIP(object):
 		self.horizon = None
 		self.bigm = None
 		self.x = None  # mip variables shortcut
-
+		self.task_pairs = None  # pairs of tasks which can be on the same unary resource
+		self.cumulative = None  # resources which are modelled by a resource flow
+		self.var_keys = None  # keys of the mip variables in the order of creation
+		self.long_names = False  # name the variables by their keys instead of x0, x1, ...
+
+	def _var(self, key, low=0, up=0, cat='Binary'):
+		# short names keep pulp fast, the i-th variable x<i> has the key self.var_keys[i]
+		if self.long_names:
+			name = str(key)
+		else:
+			name = 'x%i' % len(self.var_keys)
+		self.var_keys.append(key)
+		return self.mip.var(name, low, up, cat)
 
 	def build_mip_from_scenario(self, task_groups=None, msg=0):
 
@@ -71,18 +177,39 @@ class ContinuousMIP(object):
 		BIGM = self.bigm
 
 		mip = self.mip
+		self.var_keys = list()
+		self.long_names = bool(msg)
 		#mip = pl.LpProblem(str(S), pl.LpMinimize)
 		cons = list() # log of constraints for debugging
 
+		# start windows implied by the periods, bounds and precedences,
+		# without horizon the starts are not bounded from above
+		if S.horizon is not None:
+			windows = _get_task_windows(S, { T : [T] for T in S.tasks() })
+		else:
+			windows = { T : (0, None) for T in S.tasks() }
+
+		def get_bigm(T, T_, dist):
+			# smallest big-m such that x[T] + dist <= x[T_] + big-m for all starts
+			# in the windows, the global bigm is only used without windows
+			if windows[T][1] is None:
+				return BIGM
+			return max(windows[T][1] + dist - windows[T_][0], 0)
+
 		# task variables
 		x = dict()
 
 		for T in S.tasks():
-			x[T] = mip.var(str(T),up=self.horizon,cat='Continuous')#pl.LpVariable(str(T), 0)
+			est, lst = windows[T]
+			x[T] = self._var(T,low=est,up=None if lst is None else max(est,lst),cat='Continuous')
+			#pl.LpVariable(str(T), 0)
+			# an empty window makes the model infeasible
+			if lst is not None and est > lst:
+				cons.append(mip.con([ (x[T],1) ],sense=-1,rhs=lst))
 			# add task vs resource variabls
 			for RA in T.resources_req:
 				for R in RA:
-					x[(T, R)] = mip.var(str((T, R))) #pl.LpVariable(str((T, R)), 0, 1, cat=pl.LpBinary)
+					x[(T, R)] = self._var((T, R)) #pl.LpVariable(str((T, R)), 0, 1, cat=pl.LpBinary)
 
 		# resources req
 		for T in S.tasks():
@@ -112,81 +239,219 @@ class ContinuousMIP(object):
 		#mip += pl.LpAffineExpression([ (x[T], T.delay_cost) for T in S.tasks()
 		#                                        if 'delay_cost' in T and T in x ])
 
-		# same resource variable
-		task_pairs = [(T, T_) for T in S.tasks() for T_ in S.tasks() if str(T) < str(T_)]
+		# resources of size one where each task requires one unit are unary and
+		# modelled by disjunctions, all other resources are cumulative
+		coeffs = { (T,R) : RA[R] for T in S.tasks() for RA in T.resources_req for R in RA }
+		cumulative = { R for R in S.resources() if R.size is not None and R.size > 1 }
+		cumulative |= { R for (T,R) in coeffs if coeffs[T,R] != 1 }
+
+		# candidate resources of each task, and the unary resources which are mandatory,
+		# the resources of a previous solution are only used for the warm start
+		resources = dict()
+		mandatory_resources = dict()
+		for T in S.tasks():
+			resources[T] = set(S.resources(task=T))
+			mandatory_resources[T] = { R for RA in T.resources_req if len(RA) == 1 for R in RA } \
+									 & resources[T] - cumulative
+		resource_tasks = collections.defaultdict(list)
+		for T in S.tasks():
+			for R in resources[T]:
+				resource_tasks[R].append(T)
+
+		# only pairs of tasks with a common unary resource can conflict, these are
+		# generated from the tasks of each resource
+		task_pairs = list()
+		for T in S.tasks():
+			partners = { T_ for R in resources[T] - cumulative for T_ in resource_tasks[R] if str(T) < str(T_) }
+			task_pairs += [ (T, T_) for T_ in sorted(partners, key=str) ]
+
+		# transitive closure of the precedences without resource specification
+		successors = collections.defaultdict(set)
+		for P in S.precs_lax() + S.precs_tight():
+			if P.resource_left is not None or P.resource_right is not None:
+				continue
+			if P.offset >= 0:
+				successors[P.task_left].add(P.task_right)
+		for P in S.precs_tight():
+			# a tight precedence with a large negative offset puts the right task first
+			if P.resource_left is None and P.resource_right is None and \
+			   P.task_left.length + P.offset <= -P.task_right.length:
+				successors[P.task_right].add(P.task_left)
+		closure = dict()
+		def reachable(T):
+			if T not in closure:
+				closure[T] = set()
+				stack = list(successors[T])
+				while stack:
+					T_ = stack.pop()
+					if T_ not in closure[T]:
+						closure[T].add(T_)
+						stack.extend(successors[T_])
+			return closure[T]
+
+		def is_ordered(T, T_):
+			# the order of the tasks is fixed by the precedences or the windows
+			return T_ in reachable(T) or T in reachable(T_) or \
+				get_bigm(T, T_, T.length) <= 0 or get_bigm(T_, T, T_.length) <= 0
+
+		# same resource variable, tasks which share a mandatory resource are always
+		# on the same resource and need no variable (None)
+		same_resource = dict()
+		num_ordered = 0
 		for (T, T_) in task_pairs:
-			if T.resources:
-				resources = T.resources
-			else:
-				resources = S.resources(task=T)
-			if T_.resources:
-				resources_ = T_.resources
+			shared_resources = list(resources[T] & resources[T_] - cumulative)
+			# no disjunction is needed if the tasks cannot overlap
+			if is_ordered(T, T_):
+				num_ordered += 1
+				continue
+			if mandatory_resources[T] & mandatory_resources[T_]:
+				same_resource[T, T_] = same_resource[T_, T] = None
 			else:
-				resources_ = S.resources(task=T_)
-			shared_resources = list(set(resources) & set(resources_))
-
-			# TODO: restrict the number of variables
-			if shared_resources:
-				x[(T, T_, 'SameResource')] = \
-					mip.var(str((T, T_, 'SameResource')),up=S.horizon,cat='Integer')
+				x[(T, T_, 'SameResource')] = x[(T_, T, 'SameResource')] = \
+					self._var((T, T_, 'SameResource'),up=S.horizon,cat='Integer')
 				#   pl.LpVariable(str((T, T_, 'SameResource')), lowBound=0)  # ,cat=pl.LpInteger)
-				x[(T_, T, 'SameResource')] = \
-					mip.var(str((T_, T, 'SameResource')),up=S.horizon,cat='Integer')
-				#   pl.LpVariable(str((T_, T, 'SameResource')), lowBound=0)  # ,cat=pl.LpInteger)
-				affine = [ (x[(T, T_, 'SameResource')],1), (x[(T_, T, 'SameResource')],-1) ]
-				cons.append(mip.con(affine,sense=0,rhs=0))
-				#mip += x[(T, T_, 'SameResource')] == x[(T_, T, 'SameResource')]
+				same_resource[T, T_] = same_resource[T_, T] = x[(T, T_, 'SameResource')]
 				for R in shared_resources:
 					affine = [ (x[(T, R)],1), (x[(T_, R)],1), (x[(T, T_, 'SameResource')],-1)]
 					cons.append(mip.con(affine,sense=-1,rhs=1))
 					#mip += x[(T, R)] + x[(T_, R)] - 1 <= x[(T, T_, 'SameResource')]
-				# ordering variables
-				x[(T, T_)] = mip.var(str((T, T_)))#pl.LpVariable(str((T, T_)), 0, 1, cat=pl.LpBinary)
-				x[(T_, T)] = mip.var(str((T_, T)))#pl.LpVariable(str((T_, T)), 0, 1, cat=pl.LpBinary)
-				affine = [ (x[(T, T_)],1), (x[(T_, T)],1)]
-				cons.append(mip.con(affine,sense=0,rhs=1))
-				#mip += x[(T, T_)] + x[(T_, T)] == 1
+			# big-m of both directions of the disjunction
+			bigm, bigm_ = get_bigm(T, T_, T.length), get_bigm(T_, T, T_.length)
+			# the same resource variable is a constant if it is fixed to 1
+			if same_resource[T, T_] is None:
+				same_affine, same_affine_ = [], []
+				same_bigm, same_bigm_ = 0, 0
+			else:
+				same_affine = [ (same_resource[T, T_], bigm) ]
+				same_affine_ = [ (same_resource[T, T_], bigm_) ]
+				same_bigm, same_bigm_ = bigm, bigm_
+
+			# ordering variables
+			x[(T, T_)] = self._var((T, T_))#pl.LpVariable(str((T, T_)), 0, 1, cat=pl.LpBinary)
+			x[(T_, T)] = self._var((T_, T))#pl.LpVariable(str((T_, T)), 0, 1, cat=pl.LpBinary)
+			affine = [ (x[(T, T_)],1), (x[(T_, T)],1)]
+			cons.append(mip.con(affine,sense=0,rhs=1))
+			#mip += x[(T, T_)] + x[(T_, T)] == 1
 
-				affine = [ (x[T],1), (x[T_],-1), (x[(T, T_)],BIGM), (x[(T, T_, 'SameResource')], BIGM) ]
-				cons.append(mip.con(affine,sense=-1,rhs=2*BIGM-T.length))
-				#mip += x[T] + T.length <= x[T_] + \
-				#           (1 - x[(T, T_)]) * BIGM + (1 - x[(T, T_, 'SameResource')]) * BIGM
-				affine = [ (x[T_],1), (x[T],-1), (x[(T, T_)],-BIGM), (x[(T, T_, 'SameResource')], BIGM) ]
-				cons.append(mip.con(affine,sense=-1,rhs=BIGM-T_.length))
-				#mip += x[T_] + T_.length <= x[T] + \
-				#        x[(T, T_)] * BIGM + (1 - x[(T, T_, 'SameResource')]) * BIGM
+			affine = [ (x[T],1), (x[T_],-1), (x[(T, T_)],bigm) ] + same_affine
+			cons.append(mip.con(affine,sense=-1,rhs=bigm+same_bigm-T.length))
+			#mip += x[T] + T.length <= x[T_] + \
+			#           (1 - x[(T, T_)]) * bigm + (1 - x[(T, T_, 'SameResource')]) * bigm
+			affine = [ (x[T_],1), (x[T],-1), (x[(T, T_)],-bigm_) ] + same_affine_
+			cons.append(mip.con(affine,sense=-1,rhs=same_bigm_-T_.length))
+			#mip += x[T_] + T_.length <= x[T] + \
+			#        x[(T, T_)] * bigm_ + (1 - x[(T, T_, 'SameResource')]) * bigm_
 
 
-		# precedence constraints
+		if msg:
+			print('INFO: %i of %i task pairs are ordered by precedences or windows' % (num_ordered, len(task_pairs)))
+
+		def get_before(T, T_):
+			# returns if T can end before T_ starts, and the binary which is 1 in this
+			# case, the binary is None if this holds in all solutions
+			if T_ in reachable(T) or get_bigm(T, T_, T.length) <= 0:
+				return True, None
+			if T in reachable(T_) or get_bigm(T_, T, T_.length) <= 0:
+				return False, None
+			if (T, T_, 'Before') not in x:
+				x[(T, T_, 'Before')] = self._var((T, T_, 'Before'))
+				bigm = get_bigm(T, T_, T.length)
+				affine = [ (x[T],1), (x[T_],-1), (x[(T, T_, 'Before')],bigm) ]
+				cons.append(mip.con(affine,sense=-1,rhs=bigm-T.length))
+				#mip += x[T] + T.length <= x[T_] + (1 - x[(T, T_, 'Before')]) * bigm
+				if (T_, T, 'Before') in x:
+					affine = [ (x[(T, T_, 'Before')],1), (x[(T_, T, 'Before')],1) ]
+					cons.append(mip.con(affine,sense=-1,rhs=1))
+			return True, x[(T, T_, 'Before')]
+
+		# cumulative resources as resource flow: each task receives its demand either
+		# from the source, which provides the size of the resource, or from tasks which
+		# end before it starts. Hence, the model does not depend on the horizon
+		for R in sorted(cumulative, key=str):
+			tasks = [ T for T in resource_tasks[R] if T.length > 0 and coeffs.get((T,R)) ]
+			resource_size = 1.0
+			if R.size is not None:
+				resource_size = R.size
+			inflow = { T : list() for T in tasks }
+			outflow = { T : list() for T in tasks }
+			for T in tasks:
+				x[(T, R, 'Source')] = self._var((T, R, 'Source'),up=coeffs[T,R],cat='Continuous')
+				inflow[T].append((x[(T, R, 'Source')],1))
+			affine = [ (x[(T, R, 'Source')],1) for T in tasks ]
+			cons.append(mip.con(affine,sense=-1,rhs=resource_size))
+			for T in tasks:
+				for T_ in tasks:
+					if T is T_:
+						continue
+					possible, before = get_before(T, T_)
+					if not possible:
+						continue
+					flow_up = min(coeffs[T,R],coeffs[T_,R])
+					x[(T, T_, R, 'Flow')] = self._var((T, T_, R, 'Flow'),up=flow_up,cat='Continuous')
+					outflow[T].append((x[(T, T_, R, 'Flow')],1))
+					inflow[T_].append((x[(T, T_, R, 'Flow')],1))
+					# flow only if T ends before T_ starts
+					if before is not None:
+						affine = [ (x[(T, T_, R, 'Flow')],1), (before,-flow_up) ]
+						cons.append(mip.con(affine,sense=-1,rhs=0))
+			# the demand flows through the task if it uses the resource
+			for T in tasks:
+				affine = inflow[T] + [ (x[(T, R)],-coeffs[T,R]) ]
+				cons.append(mip.con(affine,sense=0,rhs=0))
+				affine = outflow[T] + [ (x[(T, R)],-coeffs[T,R]) ]
+				cons.append(mip.con(affine,sense=-1,rhs=0))
+
+		# capacity constraints, slices are not supported since the overlap
+		# of a slice and a task depends on the start of the task
+		count = 0 #to distinguish variables
+		for C in S.capacity():
+			affines = list()
+			for SL in C.slices():
+				if SL._start is not None or SL._end is not None:
+					raise Exception('ERROR: mip_bigm does not support capacity constraints with slices')
+				if SL.kind not in ['sum','max']:
+					raise Exception('ERROR: mip_bigm does not support capacity constraints of kind %s'%SL.kind)
+				R = SL.resource
+				coeff = C.SLA[SL]
+				affine = [ (x[(T, R)], coeff*SL.weight(T)) for T in resource_tasks[R]
+						   if (T, R) in x and SL.weight(T) ]
+				if SL.kind == 'sum':
+					affines += affine
+				elif affine:
+					# max slices are bounded by a variable
+					x['cap_%i'%count,R] = self._var(('cap_%i'%count,R),up=None,cat='Continuous')
+					for affine_ in affine:
+						cons.append(mip.con([ affine_, (x['cap_%i'%count,R],-1) ],sense=-1,rhs=0))
+					affines.append((x['cap_%i'%count,R],1))
+					count += 1
+			if affines:
+				cons.append(mip.con(affines,sense=-1,rhs=C.bound))
+
+		# precedence constraints, the same semantics as in the discrete mip,
+		# that is, also a negative offset is added to the end of the left task
 		for P in S.precs_lax():
-			if P.offset >= 0:
-				affine = [ (x[P.task_left],1), (x[P.task_right],-1) ]
-				cons.append(mip.con(affine,sense=-1,rhs=-P.task_left.length-P.offset))
-				#mip += x[P.task_left] + P.task_left.length + P.offset <= x[P.task_right]
-			elif P.offset < 0:
-				affine = [ (x[P.task_left],1), (x[P.task_right],-1) ]
-				cons.append(mip.con(affine,sense=-1,rhs=P.task_right.length-P.offset))
-				#mip += x[P.task_left] <= x[P.task_right] + P.task_right.length - P.offset
+			affine = [ (x[P.task_left],1), (x[P.task_right],-1) ]
+			cons.append(mip.con(affine,sense=-1,rhs=-P.task_left.length-P.offset))
+			#mip += x[P.task_left] + P.task_left.length + P.offset <= x[P.task_right]
 
 		# tight precedence constraints
 		for P in S.precs_tight():
-			if P.offset >= 0:
-				affine = [ (x[P.task_left],1), (x[P.task_right],-1) ]
-				cons.append(mip.con(affine,sense=0,rhs=-P.task_left.length-P.offset))
-				#mip += x[P.task_left] + P.task_left.length + P.offset == x[P.task_right]
-			elif P.offset < 0:
-				affine = [ (x[P.task_left],1), (x[P.task_right],-1) ]
-				cons.append(mip.con(affine,sense=0,rhs=P.task_right.length-P.offset))
-				#mip += x[P.task_left] == x[P.task_right] + P.task_right.length - P.offset
-
-		# conditional precedence constraints
+			affine = [ (x[P.task_left],1), (x[P.task_right],-1) ]
+			cons.append(mip.con(affine,sense=0,rhs=-P.task_left.length-P.offset))
+			#mip += x[P.task_left] + P.task_left.length + P.offset == x[P.task_right]
+
+		# conditional precedence constraints, these are required if both tasks
+		# use the same resource
 		for P in S.precs_cond():
-			affine = [ (x[P.task_left],1), (x[P.task_right],-1),
-					   (x[(P.task_left, P.task_right, 'SameResource')],BIGM) ]
-			cons.append(mip.con(affine,sense=-1,rhs=-P.task_left.length-P.offset+1*BIGM))
-			#mip += x[P.task_left] + P.task_left.length + P.offset <= x[P.task_right] + \
-			#                   (1 - x[(P.task_left, P.task_right)]) * BIGM + (1 - x[
-			#   (P.task_left, P.task_right, 'SameResource')]) * BIGM
+			left, right = P.task_left, P.task_right
+			dist = left.length+P.offset
+			bigm = get_bigm(left, right, dist)
+			for R in resources[left] & resources[right]:
+				if (left, R) not in x or (right, R) not in x:
+					continue
+				affine = [ (x[left],1), (x[right],-1), (x[(left, R)],bigm), (x[(right, R)],bigm) ]
+				cons.append(mip.con(affine,sense=-1,rhs=2*bigm-dist))
+				#mip += x[left] + dist <= x[right] + (1 - x[(left, R)]) * bigm + (1 - x[(right, R)]) * bigm
 
 		# upper bounds
 		for P in S.bounds_up():
@@ -212,30 +477,6 @@ class ContinuousMIP(object):
 			cons.append(mip.con(affine,sense=0,rhs=P.bound))
 			#mip += x[P.task] == P.bound
 
-		'''
-		# capacity lower bounds
-		for C in S.capacity_low():
-			# ignore sliced capacity constraints
-			if C._start != None or C._end != None:
-				continue
-			affine = [ (x[T, C.resource], C.weight(T=T,t=0)) for T in S.tasks()
-					   if (T,C.resource) in x and C.weight(T=T,t=0) ]
-			if not affine:
-				continue
-			cons.append(mip.con(affine, sense=1, rhs=C.bound))
-
-		# capacity upper bounds
-		for C in S.capacity_up():
-			# ignore sliced capacity constraints
-			if C._start != None or C._end != None:
-				continue
-			affine = [ (x[T, C.resource], C.weight(T=T,t=0)) for T in S.tasks()
-					   if (T,C.resource) in x and C.weight(T=T,t=0) ]
-			if not affine:
-				continue
-			cons.append(mip.con(affine, sense=-1, rhs=C.bound))
-		'''
-
 		'''
 		for con in cons:
 			mip.add_con(con)
@@ -243,31 +484,75 @@ class ContinuousMIP(object):
 
 		self.mip = mip
 		self.x = x
+		self.task_pairs = task_pairs
+		self.cumulative = cumulative
 
 	def read_solution_from_mip(self, msg=0):
 		for T in self.scenario.tasks():
-			if self.x[T].varValue is None:
+			if self.mip.value(self.x[T]) is None:
 				T.start_value = 0
 			else:
-				T.start_value = int(self.x[T].varValue)
-			if T.resources:
-				resources = T.resources
-			else:
-				resources = self.scenario.resources(task=T)
+				# round since solvers like HiGHS return values within a tolerance
+				T.start_value = int(round(self.mip.value(self.x[T])))
+			resources = self.scenario.resources(task=T)
 
 			task_resources = []
 			for resource in resources:
 				value = self.mip.value(self.x[(T,resource)])
-				if value != None and value > 0:
+				if value != None and value > 0.5:
 					task_resources.append(resource)
 			T.resources = task_resources
 
-	def solve(self, scenario, bigm=10000, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, msg=0):
-
+	def compile(self, scenario, bigm=10000, msg=0):
 		self.scenario = scenario
 		self.horizon = self.scenario.horizon
 		self.bigm = bigm
+		start_time = time.time()
 		self.build_mip_from_scenario(msg=msg)
+		self.build_time = time.time() - start_time
+		return self
+
+	def set_warm_start(self):
+		"""
+		Sets the start values of the variables according to the start_value
+		and resources of the tasks in the scenario, tasks without start_value
+		are ignored
+		"""
+		S = self.scenario
+		x = self.x
+		for T in S.tasks():
+			if T.start_value is None:
+				continue
+			self.mip.set_start(x[T], T.start_value)
+			for RA in T.resources_req:
+				for R in RA:
+					self.mip.set_start(x[(T, R)], int(R in (T.resources or [])))
+		for (T, T_) in self.task_pairs:
+			if T.start_value is None or T_.start_value is None:
+				continue
+			if (T, T_, 'SameResource') in x:
+				same_resource = bool(set(T.resources or []) & set(T_.resources or []) - self.cumulative)
+				self.mip.set_start(x[(T, T_, 'SameResource')], int(same_resource))
+			if (T, T_) not in x:
+				continue
+			# ordering variables
+			self.mip.set_start(x[(T, T_)], int(T.start_value <= T_.start_value))
+			self.mip.set_start(x[(T_, T)], int(T.start_value > T_.start_value))
+		# order of tasks on cumulative resources
+		for key in x:
+			if not isinstance(key,tuple) or len(key) != 3 or key[2] != 'Before':
+				continue
+			T, T_ = key[0], key[1]
+			if T.start_value is None or T_.start_value is None:
+				continue
+			self.mip.set_start(x[key], int(T.start_value + T.length <= T_.start_value))
+
+	def solve(self, scenario, bigm=10000, kind='CBC', time_limit=None, random_seed=None, ratio_gap=0.0, warm_start=False,
+			  threads=None, msg=0):
+
+		self.compile(scenario, bigm=bigm, msg=msg)
+		if warm_start:
+			self.set_warm_start()
 
 		params = dict()
 		if time_limit is not None:
@@ -276,7 +561,12 @@ class ContinuousMIP(object):
 			params['random_seed'] = str(random_seed)
 		params['kind']= kind
 		params['ratio_gap'] = str(ratio_gap)
+		params['warm_start'] = warm_start
+		if threads is not None:
+			params['threads'] = threads
 		self.mip.solve(msg=msg,**params)
+		self.mip.stats.build_time = self.build_time
+		self.scenario.solve_stats = self.mip.stats
 		#_solve_mip(self.mip, kind=kind, params=params, msg=msg)
 
 		if self.mip.status() == 1:
@@ -0,0 +1,489 @@
+#! /usr/bin/python
+from __future__ import absolute_import as _absolute_import
+from __future__ import print_function
+
+'''
+Copyright 2015 Tim Nonner
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+'''
+
+
+"""
+a mip-interface with the same methods as mip_pulp.MIP, but the model is assembled
+in integer-indexed arrays (coordinate format) instead of pulp objects. Variables
+and constraints are plain integer indices
+"""
+
+import array
+import gzip
+import itertools
+import os
+import subprocess
+import tempfile
+import time
+import uuid
+
+import pulp as pl
+
+from . import stats
+
+_INF = float('inf')
+
+class MIP(object):
+	"""
+	Sparse matrix mip
+	"""
+
+	def __init__(self,name,kind='Minimize'):
+		self.name = name
+		self.kind = kind
+		# columns
+		self.col_low = array.array('d')
+		self.col_up = array.array('d')
+		self.col_int = array.array('b')
+		self.col_obj = array.array('d')
+		# rows
+		self.row_sense = array.array('b')
+		self.row_rhs = array.array('d')
+		# nonzeros in coordinate format
+		self.nz_row = array.array('i')
+		self.nz_col = array.array('i')
+		self.nz_val = array.array('d')
+		# initial values for warm starts
+		self.start = dict()
+		# solution
+		self.values = None
+		self._status = 0
+		self._optimal = False
+		self.stats = stats.SolveStats()
+
+	def var(self,name,low=0,up=0,cat='Binary'):
+		# same semantics as pulp, binary variables ignore the given bounds
+		if cat == 'Binary':
+			low, up = 0, 1
+		if low is None:
+			low = -_INF
+		if up is None:
+			up = _INF
+		self.col_low.append(low)
+		self.col_up.append(up)
+		self.col_int.append(cat != 'Continuous')
+		self.col_obj.append(0)
+		return len(self.col_low)-1
+
+	def _compress_affine(self,affine):
+		affine_ = dict()
+		for a,b in affine:
+			affine_[a] = affine_.get(a,0) + b
+		return affine_
+
+	def con(self,affine,sense=0,rhs=0):
+		affine = self._compress_affine(affine)
+		row = len(self.row_rhs)
+		self.row_sense.append(sense)
+		self.row_rhs.append(rhs)
+		self.nz_row.extend(itertools.repeat(row,len(affine)))
+		self.nz_col.extend(affine.keys())
+		self.nz_val.extend(affine.values())
+		return row
+
+	def obj(self,affine):
+		self.col_obj = array.array('d',[0.0])*len(self.col_low)
+		for a,b in self._compress_affine(affine).items():
+			self.col_obj[a] = b
+
+	def set_bounds(self,var,low=0,up=0):
+		self.col_low[var] = -_INF if low is None else low
+		self.col_up[var] = _INF if up is None else up
+
+	def set_obj_coeff(self,var,coeff):
+		self.col_obj[var] = coeff
+
+	def set_sense(self,con,sense=0):
+		self.row_sense[con] = sense
+
+	def set_start(self,var,value):
+		self.start[var] = value
+
+	def write_start(self,f):
+		"""
+		writes the initial values in the solution format of cbc to the file object f
+		"""
+		f.write('Stopped on time - objective value 0\n')
+		for j in sorted(self.start):
+			f.write('%7i x%i %15.12g 0\n' % (j,j,self.start[j]))
+
+	def column_links(self):
+		"""
+		returns the nonzeros of each column as linked lists (first, next) over the
+		coordinate arrays, the entries of column j are at positions first[j],
+		next[first[j]], ... until -1. This needs one integer per nonzero instead of
+		a second copy of the nonzeros
+		"""
+		first = array.array('i',[-1])*len(self.col_low)
+		next_ = array.array('i',[-1])*len(self.nz_col)
+		# backwards such that the entries of each column keep the order of the rows
+		for k in range(len(self.nz_col)-1,-1,-1):
+			j = self.nz_col[k]
+			next_[k] = first[j]
+			first[j] = k
+		return first, next_
+
+	def write_mps(self,f):
+		"""
+		writes the model in mps-format to the file object f, names are padded to
+		the fields of the fixed format, longer names require the free format. The
+		columns are written from the coordinate arrays through column_links
+		"""
+		f.write('NAME pyschedule\n')
+		f.write('OBJSENSE\n    %s\n' % {'Minimize':'MIN','Maximize':'MAX'}[self.kind])
+		f.write('ROWS\n N  obj\n')
+		senses = { 0:'E', -1:'L', 1:'G' }
+		for i,sense in enumerate(self.row_sense):
+			f.write(' %s  c%i\n' % (senses[sense],i))
+		f.write('COLUMNS\n')
+		first, next_ = self.column_links()
+		is_int = False
+		for j in range(len(self.col_low)):
+			if self.col_int[j] != is_int:
+				is_int = self.col_int[j]
+				f.write('    MARKER  \'MARKER\'  \'%s\'\n' % ('INTORG' if is_int else 'INTEND'))
+			f.write('    %-8s  %-8s  %.12g\n' % ('x%i'%j,'obj',self.col_obj[j]))
+			k = first[j]
+			while k >= 0:
+				f.write('    %-8s  %-8s  %.12g\n' % ('x%i'%j,'c%i'%self.nz_row[k],self.nz_val[k]))
+				k = next_[k]
+		del first, next_
+		if is_int:
+			f.write('    MARKER  \'MARKER\'  \'INTEND\'\n')
+		f.write('RHS\n')
+		for i,rhs in enumerate(self.row_rhs):
+			if rhs:
+				f.write('    %-8s  %-8s  %.12g\n' % ('rhs','c%i'%i,rhs))
+		f.write('BOUNDS\n')
+		for j in range(len(self.col_low)):
+			low, up = self.col_low[j], self.col_up[j]
+			if low == up:
+				f.write(' FX %-8s  %-8s  %.12g\n' % ('bnd','x%i'%j,low))
+				continue
+			if low == -_INF:
+				f.write(' MI %-8s  %-8s\n' % ('bnd','x%i'%j))
+			elif low != 0:
+				f.write(' LO %-8s  %-8s  %.12g\n' % ('bnd','x%i'%j,low))
+			if up != _INF:
+				f.write(' UP %-8s  %-8s  %.12g\n' % ('bnd','x%i'%j,up))
+			elif self.col_int[j]:
+				f.write(' PL %-8s  %-8s\n' % ('bnd','x%i'%j))
+		f.write('ENDATA\n')
+
+	def write_lp(self,f):
+		"""
+		writes the model in lp-format to the file object f
+		"""
+		def write_affine(nz):
+			# lp-files have a limited line length
+			for k,(j,v) in enumerate(nz):
+				if k and not k % 8:
+					f.write('\n ')
+				f.write(' %+.12g x%i' % (v,j))
+			if not nz:
+				f.write(' 0 x0')
+
+		f.write('\\ pyschedule\n')
+		f.write('%s\n obj:' % self.kind)
+		write_affine([ (j,v) for j,v in enumerate(self.col_obj) if v ])
+		f.write('\nSubject To\n')
+		senses = { 0:'=', -1:'<=', 1:'>=' }
+		# the nonzeros of a row are consecutive
+		k = 0
+		for i in range(len(self.row_rhs)):
+			nz = list()
+			while k < len(self.nz_row) and self.nz_row[k] == i:
+				nz.append((self.nz_col[k],self.nz_val[k]))
+				k += 1
+			f.write(' c%i:' % i)
+			write_affine(nz)
+			f.write(' %s %.12g\n' % (senses[self.row_sense[i]],self.row_rhs[i]))
+		f.write('Bounds\n')
+		for j in range(len(self.col_low)):
+			low, up = self.col_low[j], self.col_up[j]
+			if low == up:
+				f.write(' x%i = %.12g\n' % (j,low))
+			elif low == -_INF and up == _INF:
+				f.write(' x%i free\n' % j)
+			elif low == -_INF:
+				f.write(' -inf <= x%i <= %.12g\n' % (j,up))
+			elif up == _INF:
+				if low != 0:
+					f.write(' x%i >= %.12g\n' % (j,low))
+			else:
+				f.write(' %.12g <= x%i <= %.12g\n' % (low,j,up))
+		if any(self.col_int):
+			f.write('General\n')
+			for j in range(len(self.col_low)):
+				if self.col_int[j]:
+					f.write(' x%i\n' % j)
+		f.write('End\n')
+
+	def write(self,filename):
+		"""
+		writes the model to the file with the given name, the format is lp if
+		the name ends with .lp or .lp.gz and mps otherwise, files ending with .gz
+		are compressed
+		"""
+		if filename.endswith('.gz'):
+			f = gzip.open(filename,'wt')
+			name = filename[:-len('.gz')]
+		else:
+			f = open(filename,'w')
+			name = filename
+		with f:
+			if name.endswith('.lp'):
+				self.write_lp(f)
+			else:
+				self.write_mps(f)
+
+	def read_solution(self,filename):
+		"""
+		reads a solution file in the format of cbc, or a file with lines of the
+		form name value as written by most other solvers. Files ending with .gz
+		are decompressed
+		"""
+		self.values = array.array('d',[0.0])*len(self.col_low)
+		self._optimal = False
+		if filename.endswith('.gz'):
+			f = gzip.open(filename,'rt')
+		else:
+			f = open(filename)
+		with f:
+			status_line = f.readline()
+			status_str = status_line.split()
+			if not status_str:
+				self._status = 0
+			elif status_str[0].startswith('#'):
+				# no status, e.g. gurobi
+				self._status = 1
+			elif status_str[0] == 'Optimal':
+				self._status = 1
+				self._optimal = True
+			elif status_str[0] == 'Infeasible' or status_str[0] == 'Integer':
+				self._status = -1
+			elif status_str[0] == 'Unbounded':
+				self._status = -2
+			elif status_str[0] == 'Stopped' and len(status_str) > 4 and status_str[4] == 'objective' \
+				 and 'no integer solution' not in status_line:
+				# stopped on limit, but with an integer solution, the same check as in pulp
+				self._status = 1
+			else:
+				self._status = 0
+			for line in f:
+				line = line.split()
+				if line and line[0] == '**':
+					line = line[1:]
+				# cbc writes index, name and value, other solvers name and value
+				if len(line) >= 3 and line[1].startswith('x'):
+					self.values[int(line[1][1:])] = float(line[2])
+				elif len(line) == 2 and line[0].startswith('x'):
+					self.values[int(line[0][1:])] = float(line[1])
+
+	def _solve_highs(self,msg=0,time_limit=None,ratio_gap=None,relax=False):
+		"""
+		solves the model in-process with HiGHS via scipy.optimize.milp
+		"""
+		try:
+			import numpy as np
+			from scipy import optimize, sparse
+		except ImportError:
+			raise Exception('ERROR: solver HIGHS requires scipy >= 1.9')
+		n = len(self.col_low)
+		m = len(self.row_rhs)
+		if not n:
+			# scipy does not accept models without variables, all rows are constant
+			self.values = array.array('d')
+			self._best_bound = 0.0
+			self._optimal = all( (sense > 0 or rhs >= 0) and (sense < 0 or rhs <= 0)
+								 for sense,rhs in zip(self.row_sense,self.row_rhs) )
+			self._status = 1 if self._optimal else -1
+			return
+		c = np.frombuffer(self.col_obj,dtype=np.float64)
+		if self.kind == 'Maximize':
+			c = -c
+		A = sparse.csr_matrix((np.frombuffer(self.nz_val,dtype=np.float64),
+							  (np.frombuffer(self.nz_row,dtype=np.int32),
+							   np.frombuffer(self.nz_col,dtype=np.int32))),shape=(m,n))
+		rhs = np.frombuffer(self.row_rhs,dtype=np.float64)
+		sense = np.frombuffer(self.row_sense,dtype=np.int8)
+		row_low = np.where(sense < 0,-np.inf,rhs)
+		row_up = np.where(sense > 0,np.inf,rhs)
+		options = { 'disp' : bool(msg) }
+		if time_limit is not None:
+			options['time_limit'] = time_limit
+		if ratio_gap is not None:
+			options['mip_rel_gap'] = ratio_gap
+		constraints = []
+		if m:
+			constraints = [optimize.LinearConstraint(A,row_low,row_up)]
+		integrality = np.frombuffer(self.col_int,dtype=np.int8)
+		if relax:
+			integrality = np.zeros(n,dtype=np.int8)
+		res = optimize.milp(c,integrality=integrality,
+							bounds=optimize.Bounds(np.frombuffer(self.col_low,dtype=np.float64),
+												   np.frombuffer(self.col_up,dtype=np.float64)),
+							constraints=constraints,options=options)
+		# 0: optimal, 1: iteration or time limit, 2: infeasible, 3: unbounded
+		self.values = array.array('d',[0.0])*n
+		self._optimal = res.status == 0
+		self._best_bound = getattr(res,'mip_dual_bound',None)
+		if self._best_bound is not None and self.kind == 'Maximize':
+			self._best_bound = -self._best_bound
+		if res.x is not None and res.status in [0,1]:
+			self._status = 1
+			self.values = array.array('d',res.x)
+		elif res.status == 2:
+			self._status = -1
+		elif res.status == 3:
+			self._status = -2
+		else:
+			self._status = 0
+
+	def solve(self,msg=0,**kwarg):
+		kind = 'CBC'
+		if 'kind' in kwarg:
+			kind = kwarg['kind']
+		time_limit = None
+		if 'time_limit' in kwarg:
+			time_limit = float(kwarg['time_limit'])
+		random_seed = None
+		if 'random_seed' in kwarg:
+			random_seed = kwarg['random_seed']
+		ratio_gap = None
+		if 'ratio_gap' in kwarg:
+			ratio_gap = float(kwarg['ratio_gap'])
+		warm_start = False
+		if 'warm_start' in kwarg:
+			warm_start = bool(kwarg['warm_start'])
+		threads = None
+		if 'threads' in kwarg and kwarg['threads'] is not None:
+			threads = int(kwarg['threads'])
+		# solve the lp relaxation
+		relax = False
+		if 'relax' in kwarg:
+			relax = bool(kwarg['relax'])
+		start_time = time.time()
+		if kind == 'HIGHS':
+			# scipy does not pass the number of threads to HiGHS
+			self._solve_highs(msg=msg,time_limit=time_limit,ratio_gap=ratio_gap,relax=relax)
+			self._set_stats(kind,time.time() - start_time,self._best_bound)
+			if msg:
+				print('INFO: execution time for solving mip (sec) = ' + str(time.time() - start_time))
+			if self._status == 1 and msg:
+				print('INFO: objective = ' + str(sum( self.col_obj[j]*self.values[j] for j in range(len(self.values)) )))
+			return
+		if kind == 'CBC':
+			path = pl.PULP_CBC_CMD().path
+		elif kind == 'COIN':
+			path = pl.COIN_CMD().path
+		else:
+			raise Exception('ERROR: solver ' + kind + ' not supported for matrix assembly')
+
+		tmp_filename = os.path.join(tempfile.gettempdir(),'pyschedule_%s'%str(uuid.uuid4()))
+		mps_filename = tmp_filename+'.mps'
+		sol_filename = tmp_filename+'.sol'
+		mst_filename = tmp_filename+'.mst'
+		try:
+			with open(mps_filename,'w') as f:
+				self.write_mps(f)
+			cmd = [path, mps_filename]
+			if warm_start and self.start:
+				with open(mst_filename,'w') as f:
+					self.write_start(f)
+				cmd += ['-mips', mst_filename]
+			if self.kind == 'Maximize':
+				cmd += ['-max']
+			if time_limit is not None:
+				cmd += ['-sec', str(time_limit)]
+			if random_seed is not None:
+				cmd += ['-randomSeed', str(random_seed), '-randomCbcSeed', str(random_seed)]
+			if ratio_gap is not None:
+				cmd += ['-ratio', str(ratio_gap)]
+			if threads is not None:
+				cmd += ['-threads', str(threads)]
+			if relax:
+				cmd += ['-initialSolve', '-solution', sol_filename]
+			else:
+				cmd += ['-solve', '-solution', sol_filename]
+			# the log is parsed for the best bound
+			log = list()
+			proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+									universal_newlines=True)
+			for line in proc.stdout:
+				if msg:
+					print(line, end='')
+				log.append(line)
+			proc.stdout.close()
+			rc = proc.wait()
+			if rc or not os.path.exists(sol_filename):
+				raise Exception('ERROR: error while executing ' + path)
+			self.read_solution(sol_filename)
+		finally:
+			for filename in [mps_filename, sol_filename, mst_filename]:
+				if os.path.exists(filename):
+					os.remove(filename)
+
+		# cbc can also stop within the lp and then writes a stopped status with the
+		# current lp values, a solution is only found if the log reports its objective
+		objective, best_bound = stats.parse_cbc_log(log)
+		if self._status == 1 and not self._optimal and objective is None:
+			self._status = 0
+		self._set_stats(kind,time.time() - start_time,best_bound)
+		if msg:
+			print('INFO: execution time for solving mip (sec) = ' + str(time.time() - start_time))
+		if self._status == 1 and msg:
+			print('INFO: objective = ' + str(sum( self.col_obj[j]*self.values[j] for j in range(len(self.values)) )))
+
+	def _set_stats(self,kind,solve_time,best_bound=None):
+		self.stats = stats.SolveStats(solver='mip_matrix.'+kind,
+			num_variables=len(self.col_low),
+			num_constraints=len(self.row_rhs),
+			num_nonzeros=len(self.nz_val),
+			solve_time=solve_time)
+		if self._status == 1:
+			self.stats.status = stats.OPTIMAL if self._optimal else stats.FEASIBLE
+			self.stats.objective = sum( self.col_obj[j]*self.values[j] for j in range(len(self.values)) )
+			if best_bound is None and self._optimal:
+				best_bound = self.stats.objective
+			self.stats.set_bound(best_bound)
+		elif self._status == -1:
+			self.stats.status = stats.INFEASIBLE
+		elif self._status == -2:
+			self.stats.status = stats.UNBOUNDED
+
+	def status(self):
+		return self._status
+
+	def value(self,var):
+		if self.values is None:
+			return None
+		return self.values[var]
+
+	def nonzeros(self):
+		# indices and values of all nonzero variables
+		if self.values is None:
+			return []
+		return [ (j,value) for j,value in enumerate(self.values) if value ]
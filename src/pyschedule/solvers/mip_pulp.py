@@ -29,9 +29,29 @@ a simple interface to pulp which is also an interface blueprint for potential ot
 """
 
 import pulp as pl
+import os
+import sys
+import tempfile
+import threading
 import time
+import uuid
 
 from pyschedule.solvers.pulp_scip import SCIP_CMD
+from pyschedule.solvers import stats
+
+def _tail_log(log_filename, done):
+	# prints what the solver appends to the log file until done is set
+	pos = 0
+	while True:
+		finished = done.wait(0.1)
+		if os.path.exists(log_filename):
+			with open(log_filename) as f:
+				f.seek(pos)
+				sys.stdout.write(f.read())
+				pos = f.tell()
+			sys.stdout.flush()
+		if finished:
+			return
 
 class MIP(object):
 	"""
@@ -42,9 +62,13 @@ class MIP(object):
 		kinds = {'Minimize':pl.LpMinimize, 'Maximize':pl.LpMaximize}
 		# self.mip = pl.LpProblem(name, kinds[kind])
 		self.mip = pl.LpProblem('Integer_Program', kinds[kind])
+		self.stats = stats.SolveStats()
+		self.vars = list()  # variables in the order of creation
 
 	def var(self,name,low=0,up=0,cat='Binary'):
-		return pl.LpVariable(name, low, up, cat=cat)
+		var = pl.LpVariable(name, low, up, cat=cat)
+		self.vars.append(var)
+		return var
 
 	def _compress_affine(self,affine):
 		# sum up (pulp doesnt do this)
@@ -64,6 +88,20 @@ class MIP(object):
 		affine = self._compress_affine(affine)
 		self.mip += pl.LpAffineExpression(affine)
 
+	def set_bounds(self,var,low=0,up=0):
+		var.lowBound = low
+		var.upBound = up
+
+	def set_obj_coeff(self,var,coeff):
+		self.mip.objective[var] = coeff
+
+	def set_sense(self,con,sense=0):
+		con.sense = sense
+
+	def set_start(self,var,value):
+		# initial value for warm starts
+		var.setInitialValue(value)
+
 	def solve(self,msg=0,**kwarg):
 		# kind = 'CBC'
 		if 'kind' in kwarg:
@@ -77,55 +115,121 @@ class MIP(object):
 		ratio_gap = None
 		if 'ratio_gap' in kwarg:
 			ratio_gap = float(kwarg['ratio_gap'])
+		# use initial values of variables, only for CPLEX, CBC and GUROBI
+		warm_start = False
+		if 'warm_start' in kwarg:
+			warm_start = bool(kwarg['warm_start'])
+		threads = None
+		if 'threads' in kwarg and kwarg['threads'] is not None:
+			threads = int(kwarg['threads'])
+		# solve the lp relaxation
+		mip = 1
+		if 'relax' in kwarg and kwarg['relax']:
+			mip = 0
 		start_time = time.time()
+		best_bound = None
 		# select solver for pl
 		if kind == 'CPLEX':
 			if time_limit is not None:
 				# pulp does currently not support a timelimit in 1.5.9
-				self.mip.solve(pl.CPLEX_CMD(msg=msg, timelimit=time_limit))
+				self.mip.solve(pl.CPLEX_CMD(mip=mip, msg=msg, timeLimit=time_limit, warmStart=warm_start, threads=threads))
 			else:
-				self.mip.solve(pl.CPLEX_CMD(msg=msg))
+				self.mip.solve(pl.CPLEX_CMD(mip=mip, msg=msg, warmStart=warm_start, threads=threads))
 		elif kind == 'GLPK':
-			self.mip.solve(pl.GLPK_CMD(msg=msg))
+			self.mip.solve(pl.GLPK_CMD(mip=mip, msg=msg))
 		elif kind == 'SCIP':
-			self.mip.solve(SCIP_CMD(msg=msg,time_limit=time_limit,ratio_gap=ratio_gap))
+			self.mip.solve(SCIP_CMD(mip=mip,msg=msg,time_limit=time_limit,ratio_gap=ratio_gap,threads=threads))
 		elif kind == 'CBC' or kind == 'COIN':
+			# one option per entry, newer versions of pulp prefix each entry with -
 			options = []
 			if time_limit is not None:
-				options.extend(['sec', str(time_limit)])
+				options.append('sec %s' % str(time_limit))
 			if random_seed is not None:
-				options.extend(['randomSeed', str(random_seed)])
-				options.extend(['randomCbcSeed', str(random_seed)])
+				options.append('randomSeed %s' % str(random_seed))
+				options.append('randomCbcSeed %s' % str(random_seed))
 			if ratio_gap is not None:
-				options.extend(['ratio', str(ratio_gap)])
-			if kind == 'CBC':
-				self.mip.solve(pl.PULP_CBC_CMD(msg=msg, options=options))
-			elif kind == 'COIN':
-				self.mip.solve(pl.COIN(msg=msg, options=options))
+				options.append('ratio %s' % str(ratio_gap))
+			if threads is not None:
+				options.append('threads %i' % threads)
+			# the log is parsed for the best bound, and streamed while solving if msg is set
+			log_filename = os.path.join(tempfile.gettempdir(),'pyschedule_%s.log'%str(uuid.uuid4()))
+			done = threading.Event()
+			tail = None
+			if msg:
+				tail = threading.Thread(target=_tail_log, args=(log_filename,done))
+				tail.daemon = True
+				tail.start()
+			try:
+				if kind == 'CBC':
+					self.mip.solve(pl.PULP_CBC_CMD(mip=mip, msg=0, options=options, warmStart=warm_start,
+												   logPath=log_filename))
+				elif kind == 'COIN':
+					self.mip.solve(pl.COIN(mip=mip, msg=0, options=options, warmStart=warm_start, logPath=log_filename))
+			finally:
+				done.set()
+				if tail is not None:
+					tail.join()
+				if os.path.exists(log_filename):
+					with open(log_filename) as f:
+						log = f.read()
+					os.remove(log_filename)
+					best_bound = stats.parse_cbc_log(log.splitlines())[1]
 		elif kind == 'GUROBI':
 			# GUROBI_CMD does not support a timelimit or epgap
 			# GUROBI cannot dispatch parameters from options correctly
-			options=[]
+			params = dict()
 			if time_limit is not None:
-				if ratio_gap is not None:
-					self.mip.solve(pl.GUROBI(msg=msg,timeLimit=time_limit,epgap=ratio_gap))
-			elif time_limit is not None:
-				self.mip.solve(pl.GUROBI(msg=msg, timeLimit=time_limit))
-			elif ratio_gap is not None:
-				self.mip.solve(pl.GUROBI(msg=msg, epgap=ratio_gap))
+				params['timeLimit'] = time_limit
+			if ratio_gap is not None:
+				params['epgap'] = ratio_gap
+			if threads is not None:
+				params['Threads'] = threads
+			if params:
+				self.mip.solve(pl.GUROBI(mip=mip, msg=msg, warmStart=warm_start, **params))
 			else:
-				self.mip.solve(pl.GUROBI_CMD(msg=msg))
+				self.mip.solve(pl.GUROBI_CMD(mip=mip, msg=msg, warmStart=warm_start))
 
+		elif kind == 'HIGHS':
+			raise Exception('ERROR: solver HIGHS requires the matrix backend')
 		else:
 			raise Exception('ERROR: solver ' + kind + ' not known')
 
+		self._set_stats(kind, time.time() - start_time, best_bound)
 		if msg:
 			print('INFO: execution time for solving mip (sec) = ' + str(time.time() - start_time))
 		if self.mip.status == 1 and msg:
 			print('INFO: objective = ' + str(pl.value(self.mip.objective)))
 
+	def _set_stats(self,kind,solve_time,best_bound=None):
+		constraints = self.mip.constraints
+		self.stats = stats.SolveStats(solver='mip_pulp.'+kind,
+			num_variables=len(self.mip.variables()),
+			num_constraints=len(constraints),
+			num_nonzeros=sum( len(constraints[name]) for name in constraints ),
+			solve_time=solve_time)
+		# the solution status is only available in pulp >= 2.0
+		sol_status = getattr(self.mip, 'sol_status', None)
+		if self.mip.status == 1:
+			self.stats.status = stats.OPTIMAL
+			if sol_status == pl.LpSolutionIntegerFeasible:
+				self.stats.status = stats.FEASIBLE
+			self.stats.objective = pl.value(self.mip.objective)
+			if self.stats.objective is None:
+				self.stats.objective = 0.0
+			if best_bound is None and self.stats.status == stats.OPTIMAL:
+				best_bound = self.stats.objective
+			self.stats.set_bound(best_bound)
+		elif self.mip.status == -1:
+			self.stats.status = stats.INFEASIBLE
+		elif self.mip.status == -2:
+			self.stats.status = stats.UNBOUNDED
+
 	def status(self):
 		return self.mip.status
 
 	def value(self,var):
 		return var.varValue
+
+	def nonzeros(self):
+		# indices in the order of creation and values of all nonzero variables
+		return [ (i,var.varValue) for i,var in enumerate(self.vars) if var.varValue ]
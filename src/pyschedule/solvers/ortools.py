@@ -23,11 +23,22 @@ under the License.
 
 import time, os, copy, collections
 
+from . import stats
 
 
-def solve(scenario,time_limit=None,copy_scenario=False,msg=0) :
+
+def solve(scenario,time_limit=None,copy_scenario=False,on_solution=None,msg=0) :
 	"""
 	Integration of the ortools scheduling solver
+
+	Args:
+		scenario:      scenario to solve
+		time_limit:    a time limit in seconds
+		copy_scenario: solve a copy of the scenario
+		on_solution:   function on_solution(scenario,objective,elapsed) which is called for
+		               every improving solution during the search, the start_value and
+		               resources of the tasks are set to this solution
+		msg:           0 means no feedback (default) during computation, 1 means feedback
 	"""
 
 	try :
@@ -39,6 +50,7 @@ def solve(scenario,time_limit=None,copy_scenario=False,msg=0) :
 	if copy_scenario :
 		S = copy.deepcopy(scenario)
 
+	build_start_time = time.time()
 	ort_solver = pywrapcp.Solver(S.name)
 
 	# tasks
@@ -118,22 +130,13 @@ def solve(scenario,time_limit=None,copy_scenario=False,msg=0) :
 	for P in S.bounds_up_tight() :
 		ort_solver.Add( task_to_interval[P.task].EndsAt(P.bound) )
 
-	# capacity lower bounds
-	for C in S.capacity_low():
-		# ignore sliced capacity constraints
-		if C._start != None or C._end != None:
-			continue
-		R = C.resource
-		cap_tasks = [ (resource_task_to_interval[R,T],C.weight(T=T,t=0)) for T in S.tasks() ]
-		ort_solver.Add( ort_solver.Sum([ I.PerformedExpr()*w for I,w in cap_tasks ]) >= C.bound )
-
-	# capacity lower bounds
-	for C in S.capacity_low():
-		# ignore sliced capacity constraints
-		if C._start != None or C._end != None:
+	# capacities, only sums without slices
+	for C in S.capacity():
+		if any( SL.kind != 'sum' or SL._start is not None or SL._end is not None for SL in C.slices() ):
 			continue
-		R = C.resource
-		cap_tasks = [ (resource_task_to_interval[R,T],C.weight(T=T,t=0)) for T in S.tasks() ]
+		cap_tasks = [ (resource_task_to_interval[SL.resource,T],C.SLA[SL]*SL.weight(T))
+					  for SL in C.slices() for T in S.tasks(resource=SL.resource)
+					  if (SL.resource,T) in resource_task_to_interval ]
 		ort_solver.Add( ort_solver.Sum([ I.PerformedExpr()*w for I,w in cap_tasks ]) <= C.bound )
 
 	# creates search phases.
@@ -149,6 +152,7 @@ def solve(scenario,time_limit=None,copy_scenario=False,msg=0) :
 
 	# collect solution
 	solution = ort_solver.Assignment()
+	solution.AddObjective(ort_objective_var)
 	for T in S.tasks() :
 		solution.Add(task_to_interval[T])
 	for R in S.resources() :
@@ -166,13 +170,36 @@ def solve(scenario,time_limit=None,copy_scenario=False,msg=0) :
 	solutions_limit = 10000000
 	limits = (ort_solver.Limit(ort_time_limit, branch_limit, failures_limit, solutions_limit, True))
 
+	def read_solution(start,performed):
+		for T in S.tasks() :
+			T.start_value = int(start(task_to_interval[T]))
+			T.resources = [ R \
+		                    for RA in T.resources_req for R in RA \
+		                    if performed(resource_task_to_interval[(R,T)]) ]
+
+	# report each improving solution during the search
+	class SolutionMonitor(pywrapcp.SearchMonitor):
+		def AtSolution(self):
+			read_solution(lambda I: I.StartMin(), lambda I: I.MustBePerformed())
+			on_solution(S,ort_objective_var.Min(),time.time()-start_time)
+			return False
+
 	# add log if mst is requested
 	search_params = [limits,collector,ort_objective]
 	if msg :
 		search_params.append(search_log)
+	if on_solution is not None :
+		search_params.append(SolutionMonitor(ort_solver))
 
 	# solves the problem.
+	build_time = time.time()-build_start_time
+	start_time = time.time()
 	ort_solver.Solve(main_phase,search_params)
+	S.solve_stats = stats.SolveStats(solver='ortools',
+		num_variables=len(task_to_interval)+len(resource_task_to_interval),
+		num_constraints=ort_solver.Constraints(),
+		build_time=build_time,
+		solve_time=time.time()-start_time)
 
 	# check for a solution
 	if not collector.SolutionCount():
@@ -180,13 +207,21 @@ def solve(scenario,time_limit=None,copy_scenario=False,msg=0) :
 			print('ERROR: no solution found')
 		return 0
 	solution = collector.Solution(0)
+	S.solve_stats.objective = collector.ObjectiveValue(0)
+	# the search is complete if none of the limits was reached
+	limit_reached = S.solve_stats.solve_time*1000 >= ort_time_limit or \
+	                ort_solver.Branches() >= branch_limit or \
+	                ort_solver.Failures() >= failures_limit or \
+	                ort_solver.Solutions() >= solutions_limit
+	if limit_reached:
+		S.solve_stats.status = stats.FEASIBLE
+	else:
+		S.solve_stats.status = stats.OPTIMAL
+	if S.solve_stats.status == stats.OPTIMAL:
+		S.solve_stats.set_bound(S.solve_stats.objective)
 
 	# read last solution
-	for T in S.tasks() :
-		T.start_value = int(solution.StartMin(task_to_interval[T])) #collector.StartValue(0, task_to_interval[T])
-		T.resources = [ R \
-	                    for RA in T.resources_req for R in RA \
-	                    if collector.PerformedValue(0,resource_task_to_interval[(R,T)]) == 1 ]
+	read_solution(solution.StartMin, lambda I: collector.PerformedValue(0,I) == 1)
 	return 1
 	
 
@@ -0,0 +1,219 @@
+#! /usr/bin/env python
+from __future__ import absolute_import as _absolute_import
+from __future__ import print_function
+
+'''
+Copyright 2015 Tim Nonner
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+'''
+
+import time, os, signal, functools, multiprocessing
+try:
+	import queue
+except ImportError:
+	import Queue as queue
+
+from . import stats
+
+
+def _unsupported(method, scenario):
+	"""
+	returns what the solver of the given name cannot model in the scenario, such
+	that it would return schedules which are invalid or not optimal, or None
+	"""
+	S = scenario
+	if method not in ['mip_bigm', 'ortools']:
+		return None
+	if any( T.periods is not None for T in S.tasks() ) or \
+	   any( R.periods is not None for R in S.resources() ):
+		return 'periods'
+	if any( T.schedule_cost is not None for T in S.tasks() ):
+		return 'schedule costs'
+	if any( R.cost_per_period is not None for R in S.resources() ):
+		return 'costs per period'
+	if any( T.tasks_req for T in S.tasks() ):
+		return 'resource requirements of other tasks'
+	if any( P.resource_left is not None or P.resource_right is not None
+			for P in S.precs_lax() + S.precs_tight() ):
+		return 'precedences between tasks on given resources'
+	if method == 'mip_bigm':
+		if any( SL._start is not None or SL._end is not None or SL.kind not in ['sum', 'max']
+				for C in S.capacity() for SL in C.slices() ):
+			return 'capacity constraints with slices or of kind diff'
+		return None
+	if any( R.size is not None and R.size > 1 for R in S.resources() ):
+		return 'cumulative resources'
+	if any( P.offset for P in S.precs_lax() + S.precs_tight() ) or S.precs_cond():
+		return 'precedences with offsets or conditional precedences'
+	if any( SL._start is not None or SL._end is not None or SL.kind != 'sum'
+			for C in S.capacity() for SL in C.slices() ):
+		return 'capacity constraints with slices or of kind max and diff'
+	return None
+
+
+def _get_methods(methods, scenario, msg=0):
+	from . import mip, mip_bigm, ortools
+	if methods is None:
+		methods = ['mip', 'mip_bigm', 'ortools']
+	known_methods = { 'mip': mip.solve, 'mip_bigm': mip_bigm.solve, 'ortools': ortools.solve }
+	solve_methods = list()
+	for method in methods:
+		if method in known_methods:
+			# solvers which ignore parts of the scenario are left out, otherwise
+			# their solution might be taken as the optimal one
+			reason = _unsupported(method, scenario)
+			if reason is not None:
+				if msg:
+					print('INFO: leave out solve method %s, it does not support %s' % (method, reason))
+				continue
+			method = functools.partial(known_methods[method], msg=msg)
+		if not callable(method):
+			raise Exception('ERROR: solve method %s not known' % str(method))
+		solve_methods.append(method)
+	if not solve_methods:
+		raise Exception('ERROR: none of the solve methods supports the scenario')
+	return solve_methods
+
+
+def _method_name(method):
+	if isinstance(method, functools.partial):
+		method = method.func
+	if hasattr(method, '__module__') and hasattr(method, '__name__'):
+		return '%s.%s' % (method.__module__, method.__name__)
+	return str(method)
+
+
+def _worker(index, method, scenario, time_limit, results, msg):
+	# own process group such that solver subprocesses are killed together with the worker
+	if hasattr(os, 'setpgrp'):
+		os.setpgrp()
+	# stats copied from the parent scenario must not be reported as the stats of this method
+	scenario.solve_stats = None
+	start_time = time.time()
+	try:
+		if time_limit is not None:
+			success = method(scenario, time_limit=time_limit)
+		else:
+			success = method(scenario)
+	except Exception as e:
+		if msg:
+			print('ERROR: solve method %s failed: %s' % (_method_name(method), str(e)))
+		success = 0
+	elapsed = time.time()-start_time
+	solution = None
+	if success:
+		solution = { T.name : (T.start_value, None if T.resources is None else [ R.name for R in T.resources ])
+					 for T in scenario.tasks() }
+		if all( start_value is None for start_value, resources in solution.values() ):
+			solution = None
+	objective_value = None
+	if solution is not None:
+		objective_value = stats.objective_value(scenario)
+	results.put((index, solution, objective_value, elapsed, scenario.solve_stats))
+
+
+def _kill(process):
+	if not process.is_alive():
+		return
+	try:
+		if hasattr(os, 'killpg'):
+			os.killpg(process.pid, signal.SIGKILL)
+		else:
+			process.terminate()
+	except OSError:
+		process.terminate()
+	process.join()
+
+
+def solve(scenario, methods=None, time_limit=None, grace_time=5, msg=0):
+	"""
+	Runs several solvers in parallel processes on copies of the scenario and writes
+	the best solution back. The first proven optimal solution is taken immediately
+	and the remaining solvers are stopped. A solver without solve_stats counts as
+	optimal if it returns before the time limit. Otherwise, the best solution found
+	within the time limit is used
+
+	Args:
+		scenario:    scenario to solve
+		methods:     list of solve methods, either names of solvers (mip, mip_bigm, ortools)
+		             or functions which take a scenario and a time_limit if given, default is all three.
+		             Named solvers which cannot model the scenario, e.g. mip_bigm and ortools with
+		             periods or schedule costs, are left out
+		time_limit:  a time limit which is passed to each solve method
+		grace_time:  additional time in seconds after the time limit until solvers
+		             which have not returned are stopped
+		msg:         0 means no feedback (default) during computation, 1 means feedback
+
+	Returns:
+		1 if solving was successful
+		0 if solving was not successful
+	"""
+	scenario.check()
+	solve_methods = _get_methods(methods, scenario, msg=msg)
+	results = multiprocessing.Queue()
+	processes = [ multiprocessing.Process(target=_worker, args=(i, method, scenario, time_limit, results, msg))
+				  for i, method in enumerate(solve_methods) ]
+	for process in processes:
+		process.start()
+
+	deadline = None
+	if time_limit is not None:
+		deadline = time.time() + time_limit + grace_time
+	best = None
+	try:
+		for _ in processes:
+			timeout = None
+			if deadline is not None:
+				timeout = max(deadline - time.time(), 0)
+			try:
+				index, solution, objective_value, elapsed, solve_stats = results.get(timeout=timeout)
+			except queue.Empty:
+				if msg:
+					print('INFO: time limit reached, stop remaining solvers')
+				break
+			if msg:
+				print('INFO: solve method %s returned after %.2f seconds with objective %s' %
+					  (_method_name(solve_methods[index]), elapsed, str(objective_value)))
+			if solution is None:
+				continue
+			if best is None or (objective_value is not None and
+								(best[1] is None or objective_value < best[1])):
+				best = (solution, objective_value, index, solve_stats)
+			# solver finished its search before the time limit, so there is no better solution
+			if (solve_stats is not None and solve_stats.status == stats.OPTIMAL) or \
+			   (solve_stats is None and (time_limit is None or elapsed < time_limit)):
+				best = (solution, objective_value, index, solve_stats)
+				break
+	finally:
+		for process in processes:
+			_kill(process)
+
+	if best is None:
+		if msg:
+			print('ERROR: no solution found')
+		return 0
+	solution, objective_value, index, solve_stats = best
+	scenario.solve_stats = solve_stats
+	if msg:
+		print('INFO: use solution of solve method %s' % _method_name(solve_methods[index]))
+	for T in scenario.tasks():
+		start_value, resources = solution[T.name]
+		T.start_value = start_value
+		T.resources = None if resources is None else [ scenario[name] for name in resources ]
+	return 1
@@ -6,10 +6,11 @@ import pulp
 
 class SCIP_CMD(pulp.LpSolver_CMD):
     def __init__(self, path = None, keepFiles = 0, mip = 1,
-            msg = 0, options = [], time_limit = None, ratio_gap = None):
+            msg = 0, options = [], time_limit = None, ratio_gap = None, threads = None):
         pulp.LpSolver_CMD.__init__(self, path, keepFiles, mip, msg, options)
         self.time_limit = time_limit
         self.ratio_gap = ratio_gap
+        self.threads = threads
 
     """The SCIP LP solver"""
     def defaultPath(self):
@@ -37,7 +38,13 @@ class SCIP_CMD(pulp.LpSolver_CMD):
             proc += ["-c", "set limits time %f"%self.time_limit]
         if self.ratio_gap is not None:
             proc += ["-c", "set limits gap %f"%self.ratio_gap]
-        proc += ["-c", "optimize", "-c", "write solution \"%s\"" % tmpSol, "-c", "quit"]
+        if self.threads is not None and self.threads > 1:
+            # concurrent solving with different settings in each thread
+            proc += ["-c", "set parallel maxnthreads %i"%self.threads]
+            proc += ["-c", "concurrentopt"]
+        else:
+            proc += ["-c", "optimize"]
+        proc += ["-c", "write solution \"%s\"" % tmpSol, "-c", "quit"]
         proc.extend(self.options)
 
         self.solution_time = perf_counter()
@@ -0,0 +1,130 @@
+#! /usr/bin/env python
+from __future__ import absolute_import as _absolute_import
+from __future__ import print_function
+
+'''
+Copyright 2015 Tim Nonner
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+'''
+
+"""
+statistics of a single solve, every solver attaches them to the scenario
+as scenario.solve_stats
+"""
+
+OPTIMAL = 'optimal'
+FEASIBLE = 'feasible'
+INFEASIBLE = 'infeasible'
+UNBOUNDED = 'unbounded'
+NOT_SOLVED = 'not solved'
+
+
+class SolveStats(object):
+	"""
+	Statistics of a solve, fields which are not provided by a solver are None
+
+	Attributes:
+		solver:          name of the solver, e.g. mip.CBC
+		status:          optimal, feasible, infeasible, unbounded or not solved
+		objective:       objective value of the solution
+		best_bound:      best bound on the objective value
+		gap:             relative gap between objective and best bound
+		num_variables:   number of variables
+		num_constraints: number of constraints
+		num_nonzeros:    number of nonzero coefficients in the constraints
+		build_time:      time in seconds to build the model
+		solve_time:      wall time in seconds of the solver
+	"""
+
+	_fields = ['solver', 'status', 'objective', 'best_bound', 'gap', 'num_variables',
+			   'num_constraints', 'num_nonzeros', 'build_time', 'solve_time']
+
+	def __init__(self, solver=None, status=NOT_SOLVED, objective=None, best_bound=None, gap=None,
+				 num_variables=None, num_constraints=None, num_nonzeros=None, build_time=None,
+				 solve_time=None):
+		self.solver = solver
+		self.status = status
+		self.objective = objective
+		self.best_bound = best_bound
+		self.gap = gap
+		self.num_variables = num_variables
+		self.num_constraints = num_constraints
+		self.num_nonzeros = num_nonzeros
+		self.build_time = build_time
+		self.solve_time = solve_time
+
+	def set_bound(self, best_bound):
+		"""
+		Sets the best bound and computes the gap to the objective
+		"""
+		self.best_bound = best_bound
+		self.gap = None
+		if self.objective is None or best_bound is None:
+			return
+		if abs(self.objective - best_bound) < 1e-9:
+			self.gap = 0.0
+		elif abs(self.objective) > 1e-9:
+			self.gap = abs(self.objective - best_bound) / abs(self.objective)
+
+	def as_dict(self):
+		return dict( (field, getattr(self, field)) for field in self._fields )
+
+	def __repr__(self):
+		return 'SolveStats(' + ', '.join( '%s=%s' % (field, repr(getattr(self, field)))
+										  for field in self._fields ) + ')'
+
+
+def objective_value(scenario):
+	"""
+	Returns the objective value of the solution in the scenario in the same
+	way as the discrete MIP, or None if a task without schedule_cost is not scheduled
+	"""
+	value = 0
+	for T in scenario.tasks():
+		if T.start_value is None:
+			if T.schedule_cost is None:
+				return None
+			continue
+		if T.delay_cost is not None:
+			value += T.delay_cost*T.start_value
+		if T.schedule_cost is not None:
+			value += T.schedule_cost
+		if T.resources is not None:
+			value += sum( R.cost_per_period*T.length for R in T.resources if R.cost_per_period is not None )
+	return value
+
+
+def parse_cbc_log(lines):
+	"""
+	Returns the objective value and the best bound from the final summary
+	of a cbc log, the bound equals the objective if the solution is optimal
+	"""
+	objective = None
+	best_bound = None
+	optimal = False
+	for line in lines:
+		if line.startswith('Result - '):
+			optimal = 'Optimal solution found' in line
+		elif line.startswith('Objective value:'):
+			objective = float(line.split(':')[1])
+		elif line.startswith('Lower bound:') or line.startswith('Upper bound:'):
+			best_bound = float(line.split(':')[1])
+	if optimal and best_bound is None:
+		best_bound = objective
+	return objective, best_bound